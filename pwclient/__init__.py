@@ -3,13 +3,23 @@
 #
 # SPDX-License-Identifier: GPL-2.0-or-later
 
-# TODO(stephenfin): Simplyify this when we drop support for Python 3.7
-try:
-    import importlib.metadata as importlib_metadata
-except ImportError:
-    import importlib_metadata as importlib_metadata  # type: ignore
-
-try:
-    __version__ = importlib_metadata.version(__package__ or __name__)
-except importlib_metadata.PackageNotFoundError:
-    __version__ = '0.0.0'
+import functools
+
+
+@functools.lru_cache(maxsize=1)
+def _get_version():
+    # this reads the distribution metadata from disk so we only do it on
+    # demand, rather than on every startup
+    import importlib.metadata
+
+    try:
+        return importlib.metadata.version(__package__ or __name__)
+    except importlib.metadata.PackageNotFoundError:
+        return '0.0.0'
+
+
+def __getattr__(name):
+    if name == '__version__':
+        return _get_version()
+
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
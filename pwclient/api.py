@@ -6,18 +6,36 @@ XML-RPC API.
 
 import abc
 import base64
+import collections
+import collections.abc
+import functools
+import io
 import json
-import http
 import re
 import sys
-import urllib.error
 import urllib.parse
-import urllib.request
 
 from . import exceptions
-from . import xmlrpc
-from . import __version__
-from .xmlrpc import xmlrpclib
+
+# orjson is optional but significantly faster than json, if available
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps(obj):
+        return json.dumps(obj).encode('utf-8')
+
+
+FILENAME_RE = re.compile('filename=(.+)')
+SLUG_TABLE = str.maketrans(' ', '-')
+LINK_NEXT_RE = re.compile('<([^>]+)>; *rel="next"')
+# the number of GET responses the REST backend keeps for conditional requests
+RESPONSE_CACHE_SIZE = 32
+LINK_LAST_RE = re.compile('<([^>]+)>; *rel="last"')
 
 
 class API(metaclass=abc.ABCMeta):
@@ -75,6 +93,21 @@ class API(metaclass=abc.ABCMeta):
     def patch_get(self, patch_id):
         pass
 
+    def _patch_get_or_error(self, patch_id):
+        try:
+            return self.patch_get(patch_id)
+        except Exception as exc:
+            return exc
+
+    def patch_get_many(self, patch_ids):
+        """Fetch multiple patches.
+
+        :param patch_ids: An iterable of patch IDs.
+        :returns: A list containing, for each patch, either the patch or the
+            exception raised while fetching it.
+        """
+        return [self._patch_get_or_error(x) for x in patch_ids]
+
     @abc.abstractmethod
     def patch_get_by_hash(self, hash):
         pass
@@ -83,10 +116,43 @@ class API(metaclass=abc.ABCMeta):
     def patch_get_by_project_hash(self, project, hash):
         pass
 
+    def patch_get_by_project_hash_many(self, project, hashes):
+        """Fetch multiple patches by their hashes.
+
+        :param project: The project the patches belong to.
+        :param hashes: An iterable of patch hashes.
+        :returns: A list containing, for each hash, the patch or an empty
+            dict if there is no single patch matching the hash.
+        """
+        return [self.patch_get_by_project_hash(project, h) for h in hashes]
+
     @abc.abstractmethod
-    def patch_get_mbox(self, patch_id):
+    def patch_get_mbox(self, patch_id, out_fp=None):
+        """Fetch the mbox for a patch.
+
+        :param patch_id: The ID of the patch.
+        :param out_fp: An optional binary file object. If provided, the mbox
+            is written to this as it is received rather than being returned.
+        :returns: A tuple of the mbox, or ``None`` if ``out_fp`` was
+            provided, and the suggested filename for the patch.
+        """
         pass
 
+    def _patch_get_mbox_or_none(self, patch_id):
+        try:
+            return self.patch_get_mbox(patch_id)
+        except Exception:
+            return None
+
+    def patch_get_mbox_many(self, patch_ids):
+        """Fetch the mboxes for multiple patches.
+
+        :param patch_ids: An iterable of patch IDs.
+        :returns: A list containing, for each patch, either the tuple returned
+            by ``patch_get_mbox`` or ``None`` if the mbox couldn't be fetched.
+        """
+        return [self._patch_get_mbox_or_none(x) for x in patch_ids]
+
     @abc.abstractmethod
     def patch_get_diff(self, patch_id):
         pass
@@ -101,6 +167,24 @@ class API(metaclass=abc.ABCMeta):
     ):
         pass
 
+    def patch_set_many(self, updates):
+        """Update multiple patches.
+
+        :param updates: An iterable of dicts, each containing a ``patch_id``
+            key and any of the other arguments accepted by ``patch_set``.
+        :returns: A list containing, for each update, either ``None`` on
+            success or the ``APIError`` raised on failure.
+        """
+        errors = []
+        for update in updates:
+            try:
+                self.patch_set(**update)
+            except exceptions.APIError as exc:
+                errors.append(exc)
+            else:
+                errors.append(None)
+        return errors
+
     # states
 
     @abc.abstractmethod
@@ -132,6 +216,24 @@ class API(metaclass=abc.ABCMeta):
     ):
         pass
 
+    def check_create_many(self, checks):
+        """Create multiple checks.
+
+        :param checks: An iterable of dicts, each containing the arguments
+            accepted by ``check_create``.
+        :returns: A list containing, for each check, either ``None`` on
+            success or the ``APIError`` raised on failure.
+        """
+        errors = []
+        for check in checks:
+            try:
+                self.check_create(**check)
+            except exceptions.APIError as exc:
+                errors.append(exc)
+            else:
+                errors.append(None)
+        return errors
+
 
 class XMLRPC(API):
     def __init__(self, server, *, username=None, password=None, token=None):
@@ -147,6 +249,9 @@ class XMLRPC(API):
                 'The XML-RPC API does not support API tokens'
             )
 
+        # imported here so that users of the REST API don't pay for it
+        from . import xmlrpc
+
         self._server = server
 
         transport = xmlrpc.Transport(self._server)
@@ -154,7 +259,7 @@ class XMLRPC(API):
             transport.set_credentials(username, password)
 
         try:
-            rpc = xmlrpc.xmlrpclib.ServerProxy(
+            rpc = xmlrpc.ServerProxy(
                 self._server,
                 transport=transport,
                 allow_none=True,
@@ -164,13 +269,45 @@ class XMLRPC(API):
 
         self._client = rpc
 
+        # projects, people, states and checks rarely change so we cache
+        # lookups of these for the lifetime of the client
+        self._project_get = functools.lru_cache(maxsize=256)(rpc.project_get)
+        self._person_get = functools.lru_cache(maxsize=256)(rpc.person_get)
+        self._state_get = functools.lru_cache(maxsize=256)(rpc.state_get)
+        self._check_get = functools.lru_cache(maxsize=256)(rpc.check_get)
+
+        # patches do change but not behind our back within a single command,
+        # so we cache these too and drop them whenever we update one. This is
+        # a plain dict so that batched calls can fill it in too
+        self._patches = {}
+
+        # likewise for name to ID lookups
+        self._state_ids_by_prefix = None
+        self._project_ids = {}
+        self._person_ids = {}
+
+        # Patchwork doesn't register system.multicall, so once a server has
+        # told us it doesn't support it we stop asking
+        self._multicall_supported = True
+
+    def clear_caches(self):
+        """Invalidate any cached lookups."""
+        self._project_get.cache_clear()
+        self._person_get.cache_clear()
+        self._state_get.cache_clear()
+        self._check_get.cache_clear()
+        self._patches = {}
+        self._state_ids_by_prefix = None
+        self._project_ids = {}
+        self._person_ids = {}
+
     # project
 
     def project_list(self, search_str=None, max_count=0):
         return self._client.project_list(search_str, max_count)
 
     def project_get(self, project_id):
-        return self._client.project_get(project_id)
+        return self._project_get(project_id)
 
     # person
 
@@ -178,7 +315,7 @@ class XMLRPC(API):
         return self._client.person_list(search_str, max_count)
 
     def person_get(self, person_id):
-        return self._client.person_get(person_id)
+        return self._person_get(person_id)
 
     # patch
 
@@ -186,55 +323,206 @@ class XMLRPC(API):
         """Given a partial state name, look up the state ID."""
         if len(name) == 0:
             return 0
-        states = self.state_list(name, 0)
-        for state in states:
-            if state['name'].lower().startswith(name.lower()):
-                return state['id']
-        return 0
 
-    def _patch_id_from_hash(self, project, hash):
-        patch = self.patch_get_by_project_hash(project, hash)
+        # allow callers to pass IDs directly, like the REST API does
+        if name.isdecimal():
+            return int(name)
 
-        if patch == {}:
-            sys.stderr.write("No patch has the hash provided\n")
-            sys.exit(1)
+        if self._state_ids_by_prefix is None:
+            self._cache_states(self.state_list('', 0))
 
-        patch_id = patch['id']
-        # be super paranoid
-        try:
-            patch_id = int(patch_id)
-        except ValueError:
-            sys.stderr.write("Invalid patch ID obtained from server\n")
-            sys.exit(1)
-        return patch_id
+        return self._state_ids_by_prefix.get(name.lower(), 0)
+
+    def _cache_states(self, states):
+        # there are only a handful of states so we fetch them all once and
+        # map every prefix of every state name to the first state it matches
+        self._state_ids_by_prefix = {}
+        for state in states:
+            state_name = state['name'].lower()
+            for i in range(1, len(state_name) + 1):
+                self._state_ids_by_prefix.setdefault(
+                    state_name[:i], state['id']
+                )
 
     def _project_id_by_name(self, linkname):
         """Given a project short name, look up the Project ID."""
         if len(linkname) == 0:
             return 0
-        projects = self.project_list(linkname, 0)
+
+        if linkname.isdecimal():
+            return int(linkname)
+
+        if linkname not in self._project_ids:
+            self._cache_projects(linkname, self.project_list(linkname, 0))
+
+        return self._project_ids[linkname]
+
+    def _cache_projects(self, linkname, projects):
+        self._project_ids[linkname] = 0
         for project in projects:
             if project['linkname'] == linkname:
-                return project['id']
-        return 0
+                self._project_ids[linkname] = project['id']
+                break
 
     def _person_ids_by_name(self, name):
         """Given a partial name or email address, return a list of the
         person IDs that match."""
         if len(name) == 0:
             return []
-        people = self.person_list(name, 0)
-        return [x['id'] for x in people]
+
+        if name.isdecimal():
+            return [int(name)]
+
+        if name not in self._person_ids:
+            self._cache_people(name, self.person_list(name, 0))
+
+        return self._person_ids[name]
+
+    def _cache_people(self, name, people):
+        self._person_ids[name] = [x['id'] for x in people]
+
+    def _prefetch_ids(self, state=None, project=None, person=None):
+        """Resolve the given names to IDs in a single request.
+
+        This looks up any of the names that aren't already cached using one
+        ``system.multicall`` request, rather than one request per name. The
+        results are stored in the caches used by the ``_*_by_name`` helpers.
+        """
+        from .xmlrpc import xmlrpclib
+
+        # IDs don't need to be resolved
+        state, project, person = (
+            None if name and name.isdecimal() else name
+            for name in (state, project, person)
+        )
+
+        calls = []
+        if state and self._state_ids_by_prefix is None:
+            calls.append((self._cache_states, 'state_list', ('', 0)))
+        if project and project not in self._project_ids:
+            cache = functools.partial(self._cache_projects, project)
+            calls.append((cache, 'project_list', (project, 0)))
+        if person and person not in self._person_ids:
+            cache = functools.partial(self._cache_people, person)
+            calls.append((cache, 'person_list', (person, 0)))
+
+        # there's nothing to be gained from batching a single call
+        if len(calls) < 2:
+            return
+
+        results = self._multicall([call[1:] for call in calls])
+        if results is None:  # the server doesn't support multicall
+            return
+
+        for (cache, _, _), result in zip(calls, results):
+            # if this failed we'll retry it on its own
+            if not isinstance(result, xmlrpclib.Fault):
+                cache(result)
+
+    def _patch_set_params(self, state=None, archived=None, commit_ref=None):
+        """Build the parameters for a ``patch_set`` call."""
+        params = {}
+
+        if state:
+            state_id = self._state_id_by_name(state)
+            if state_id == 0:
+                raise exceptions.APIError(
+                    'No State found matching %s*' % state
+                )
+
+            params['state'] = state_id
+
+        if commit_ref:
+            params['commit_ref'] = commit_ref
+
+        if archived:
+            params['archived'] = archived == 'yes'
+
+        return params
+
+    def _multicall(self, calls):
+        """Issue multiple calls in a single request.
+
+        :param calls: A list of ``(method, params)`` tuples.
+        :returns: A list containing, for each call, either its result or the
+            ``xmlrpclib.Fault`` it raised, or ``None`` if the server does not
+            support ``system.multicall``.
+        """
+        from .xmlrpc import xmlrpclib
+
+        if not calls:
+            return []
+
+        if not self._multicall_supported:
+            return None
+
+        multicall = xmlrpclib.MultiCall(self._client)
+        for method, params in calls:
+            getattr(multicall, method)(*params)
+
+        try:
+            results = multicall()
+        except xmlrpclib.Fault:
+            self._multicall_supported = False
+            return None
+
+        outcomes = []
+        for index in range(len(calls)):
+            try:
+                outcomes.append(results[index])
+            except xmlrpclib.Fault as f:
+                outcomes.append(f)
+
+        return outcomes
+
+    @staticmethod
+    def _raise_faults(results):
+        """Raise the first ``xmlrpclib.Fault`` in a list of call results."""
+        from .xmlrpc import xmlrpclib
+
+        for result in results:
+            if isinstance(result, xmlrpclib.Fault):
+                raise result
+
+        return results
 
     @staticmethod
     def _decode_patch(patch):
+        from .xmlrpc import xmlrpclib
+
         # Some values are transferred as Binary data, these are encoded in
         # utf-8. As of Python 3.9 xmlrpclib.Binary.__str__ however assumes
-        # latin1, so decode explicitly
-        return {
-            k: v.data.decode('utf-8') if isinstance(v, xmlrpclib.Binary) else v
-            for k, v in patch.items()
-        }
+        # latin1, so decode explicitly. We modify the patch in place since
+        # only a few fields are affected
+        for k, v in patch.items():
+            if isinstance(v, xmlrpclib.Binary):
+                patch[k] = v.data.decode('utf-8')
+        return patch
+
+    def _patch_list_many(self, filters_list):
+        """List the patches matching any of the given filters.
+
+        The queries are issued in a single ``system.multicall`` request where
+        there is more than one of them and the server supports it.
+        """
+        results = None
+        if len(filters_list) > 1:
+            results = self._multicall(
+                [('patch_list', (filters,)) for filters in filters_list]
+            )
+
+        if results is None:  # the server doesn't support multicall
+            results = (
+                self._client.patch_list(filters) for filters in filters_list
+            )
+        else:
+            self._raise_faults(results)
+
+        return [
+            self._decode_patch(patch)
+            for patches in results
+            for patch in patches
+        ]
 
     def patch_list(
         self,
@@ -265,6 +553,13 @@ class XMLRPC(API):
         if hash:
             filters['hash'] = hash
 
+        # we only filter by one of submitter or delegate; see below
+        self._prefetch_ids(
+            state=state,
+            project=project,
+            person=submitter if submitter is not None else delegate,
+        )
+
         if state is not None:
             state_id = self._state_id_by_name(state)
             if state_id == 0:
@@ -299,10 +594,13 @@ class XMLRPC(API):
                     "Note: Nobody found matching *%s*\n" % submitter
                 )
             else:
-                for person_id in person_ids:
-                    filters['submitter_id'] = person_id
-                    patches += self._client.patch_list(filters)
-            return [self._decode_patch(patch) for patch in patches]
+                patches = self._patch_list_many(
+                    [
+                        dict(filters, submitter_id=person_id)
+                        for person_id in person_ids
+                    ]
+                )
+            return patches
 
         if delegate is not None:
             patches = []
@@ -312,16 +610,22 @@ class XMLRPC(API):
                     "Note: Nobody found matching *%s*\n" % delegate
                 )
             else:
-                for delegate_id in delegate_ids:
-                    filters['delegate_id'] = delegate_id
-                    patches += self._client.patch_list(filters)
-            return [self._decode_patch(patch) for patch in patches]
+                patches = self._patch_list_many(
+                    [
+                        dict(filters, delegate_id=delegate_id)
+                        for delegate_id in delegate_ids
+                    ]
+                )
+            return patches
 
         patches = self._client.patch_list(filters)
         return [self._decode_patch(patch) for patch in patches]
 
     def patch_get(self, patch_id):
-        patch = self._client.patch_get(patch_id)
+        if patch_id not in self._patches:
+            self._patches[patch_id] = self._client.patch_get(patch_id)
+
+        patch = self._patches[patch_id]
         if patch == {}:
             raise exceptions.APIError(
                 'Unable to fetch patch %d; does it exist?' % patch_id
@@ -329,23 +633,112 @@ class XMLRPC(API):
 
         return self._decode_patch(patch)
 
+    def patch_get_many(self, patch_ids):
+        from .xmlrpc import xmlrpclib
+
+        patch_ids = list(patch_ids)
+        if len(patch_ids) < 2:
+            return super().patch_get_many(patch_ids)
+
+        results = self._multicall(
+            [('patch_get', (patch_id,)) for patch_id in patch_ids]
+        )
+        if results is None:  # the server doesn't support multicall
+            return super().patch_get_many(patch_ids)
+
+        patches = []
+        for patch_id, patch in zip(patch_ids, results):
+            if isinstance(patch, xmlrpclib.Fault):
+                patches.append(patch)
+                continue
+
+            self._patches[patch_id] = patch
+
+            if patch == {}:
+                patches.append(
+                    exceptions.APIError(
+                        'Unable to fetch patch %d; does it exist?' % patch_id
+                    )
+                )
+                continue
+
+            patches.append(self._decode_patch(patch))
+
+        return patches
+
     def patch_get_by_hash(self, hash):
         return self._client.patch_get_by_hash(hash)
 
     def patch_get_by_project_hash(self, project, hash):
         return self._client.patch_get_by_project_hash(project, hash)
 
-    def patch_get_mbox(self, patch_id):
-        patch = self.patch_get(patch_id)
+    def patch_get_by_project_hash_many(self, project, hashes):
+        hashes = list(hashes)
+        if len(hashes) < 2:
+            return super().patch_get_by_project_hash_many(project, hashes)
 
+        results = self._multicall(
+            [('patch_get_by_project_hash', (project, hash)) for hash in hashes]
+        )
+        if results is None:  # the server doesn't support multicall
+            return super().patch_get_by_project_hash_many(project, hashes)
+
+        return self._raise_faults(results)
+
+    def patch_get_mbox(self, patch_id, out_fp=None):
+        patch = self.patch_get(patch_id)
         mbox = self._client.patch_get_mbox(patch_id)
+
         if len(mbox) == 0:
             raise exceptions.APIError(
                 'Unable to fetch mbox for patch %d; does it exist?' % patch_id
             )
 
+        # XML-RPC responses can't be streamed so this is the best we can do
+        if out_fp:
+            out_fp.write(mbox.encode('utf-8'))
+            return None, patch['filename']
+
         return mbox, patch['filename']
 
+    def patch_get_mbox_many(self, patch_ids):
+        from .xmlrpc import xmlrpclib
+
+        patch_ids = list(patch_ids)
+        if len(patch_ids) < 2:
+            return super().patch_get_mbox_many(patch_ids)
+
+        # we need the patch for its filename, so fetch both in one go
+        calls = []
+        for patch_id in patch_ids:
+            calls.append(('patch_get', (patch_id,)))
+            calls.append(('patch_get_mbox', (patch_id,)))
+
+        results = self._multicall(calls)
+        if results is None:  # the server doesn't support multicall
+            return super().patch_get_mbox_many(patch_ids)
+
+        mboxes = []
+        for index, patch_id in enumerate(patch_ids):
+            patch = results[index * 2]
+            mbox = results[index * 2 + 1]
+            if not isinstance(patch, xmlrpclib.Fault):
+                self._patches[patch_id] = patch
+
+            if isinstance(patch, xmlrpclib.Fault) or isinstance(
+                mbox, xmlrpclib.Fault
+            ):
+                mboxes.append(None)
+                continue
+
+            if not patch or len(mbox) == 0:
+                mboxes.append(None)
+                continue
+
+            mboxes.append((mbox, self._decode_patch(patch)['filename']))
+
+        return mboxes
+
     def patch_get_diff(self, patch_id):
         return self._client.patch_get_diff(patch_id)
 
@@ -356,23 +749,9 @@ class XMLRPC(API):
         archived=None,
         commit_ref=None,
     ):
-        params = {}
+        from .xmlrpc import xmlrpclib
 
-        if state:
-            state_id = self._state_id_by_name(state)
-            if state_id == 0:
-                raise exceptions.APIError(
-                    'No State found matching %s*' % state
-                )
-                sys.exit(1)
-
-            params['state'] = state_id
-
-        if commit_ref:
-            params['commit_ref'] = commit_ref
-
-        if archived:
-            params['archived'] = archived == 'yes'
+        params = self._patch_set_params(state, archived, commit_ref)
 
         try:
             self._client.patch_set(patch_id, params)
@@ -380,6 +759,46 @@ class XMLRPC(API):
             raise exceptions.APIError(
                 'Error updating patch: %s' % f.faultString
             )
+        finally:
+            self._patches.pop(patch_id, None)
+
+    def patch_set_many(self, updates):
+        from .xmlrpc import xmlrpclib
+
+        updates = list(updates)
+        errors = [None] * len(updates)
+        indexes = []
+        calls = []
+
+        for index, update in enumerate(updates):
+            params = dict(update)
+            patch_id = params.pop('patch_id')
+            try:
+                params = self._patch_set_params(**params)
+            except exceptions.APIError as exc:
+                errors[index] = exc
+                continue
+
+            indexes.append(index)
+            calls.append(('patch_set', (patch_id, params)))
+
+        if len(calls) < 2:
+            return super().patch_set_many(updates)
+
+        results = self._multicall(calls)
+        if results is None:  # the server doesn't support multicall
+            return super().patch_set_many(updates)
+
+        for _, (patch_id, _) in calls:
+            self._patches.pop(patch_id, None)
+
+        for index, result in zip(indexes, results):
+            if isinstance(result, xmlrpclib.Fault):
+                errors[index] = exceptions.APIError(
+                    'Error updating patch: %s' % result.faultString
+                )
+
+        return errors
 
     # states
 
@@ -387,7 +806,7 @@ class XMLRPC(API):
         return self._client.state_list(search_str, max_count)
 
     def state_get(self, state_id):
-        return self._client.state_get(state_id)
+        return self._state_get(state_id)
 
     # checks
 
@@ -404,7 +823,7 @@ class XMLRPC(API):
 
     def check_get(self, patch_id, check_id):
         # patch_id is not necessary for the XML-RPC API
-        return self._client.check_get(check_id)
+        return self._check_get(check_id)
 
     def check_create(
         self,
@@ -414,6 +833,8 @@ class XMLRPC(API):
         target_url="",
         description="",
     ):
+        from .xmlrpc import xmlrpclib
+
         try:
             self._client.check_create(
                 patch_id,
@@ -427,9 +848,109 @@ class XMLRPC(API):
                 'Error creating check: %s' % f.faultString
             )
 
+    def check_create_many(self, checks):
+        from .xmlrpc import xmlrpclib
+
+        checks = list(checks)
+        if len(checks) < 2:
+            return super().check_create_many(checks)
+
+        calls = []
+
+        for check in checks:
+            params = (
+                check['patch_id'],
+                check['context'],
+                check['state'],
+                check.get('target_url', ''),
+                check.get('description', ''),
+            )
+            calls.append(('check_create', params))
+
+        results = self._multicall(calls)
+        if results is None:  # the server doesn't support multicall
+            return super().check_create_many(checks)
+
+        errors = [None] * len(checks)
+        for index, result in enumerate(results):
+            if isinstance(result, xmlrpclib.Fault):
+                errors[index] = exceptions.APIError(
+                    'Error creating check: %s' % result.faultString
+                )
+
+        return errors
+
+
+def _format_person(person):
+    if not person:
+        return ''
+
+    if person['name']:
+        return f"{person['name']} <{person['email']}>"
+    return person['email']
+
+
+def _format_user(user):
+    if not user:
+        return ''
+
+    return user['username']
+
+
+class _PatchView(collections.abc.Mapping):
+    """A read-only view of a REST API patch response.
+
+    This presents the fields returned by the XML-RPC API, computing each
+    from the underlying response on access.
+    """
+
+    __slots__ = ('_obj',)
+
+    _fields = {
+        'id': lambda obj: obj['id'],
+        'date': lambda obj: obj['date'],
+        'filename': lambda obj: obj.get('filename') or '',
+        'msgid': lambda obj: obj['msgid'],
+        'name': lambda obj: obj['name'],
+        'project': lambda obj: obj['project']['name'],
+        'project_id': lambda obj: obj['project']['id'],
+        'state': lambda obj: obj['state'],
+        'state_id': lambda obj: '',  # NOTE: this isn't exposed
+        'archived': lambda obj: obj['archived'],
+        'submitter': lambda obj: _format_person(obj['submitter']),
+        'submitter_id': lambda obj: obj['submitter']['id'],
+        'delegate': lambda obj: _format_user(obj['delegate']),
+        'delegate_id': lambda obj: (
+            obj['delegate']['id'] if obj['delegate'] else ''
+        ),
+        'commit_ref': lambda obj: obj['commit_ref'] or '',
+        'hash': lambda obj: obj['hash'] or '',
+    }
+
+    def __init__(self, obj):
+        self._obj = obj
+
+    def __getitem__(self, key):
+        return self._fields[key](self._obj)
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __repr__(self):
+        return repr(dict(self))
+
 
 class REST(API):
     def __init__(self, server, *, username=None, password=None, token=None):
+        # the modules the REST backend needs are imported where they're used
+        # since they're relatively expensive to import and aren't needed by
+        # the XML-RPC backend or for '--help'
+        import concurrent.futures
+        import threading
+
         # TODO(stephenfin): We want to deprecate this behavior at some point
         parsed_server = urllib.parse.urlparse(server)
         scheme = parsed_server.scheme or 'http'
@@ -450,7 +971,119 @@ class REST(API):
         self._password = password
         self._token = token
 
-    def _generate_headers(self, additional_headers=None):
+        # connections, keyed by (thread, scheme, netloc), that we reuse
+        # across requests to avoid a TCP (and TLS) handshake for every call
+        self._connections = {}
+
+        # the most recent responses to GET requests, keyed by URL, along with
+        # the headers needed to make a conditional request for them. This is
+        # bounded so we don't hold on to every page of a large listing
+        self._responses = collections.OrderedDict()
+        self._responses_lock = threading.Lock()
+
+        # used to issue independent requests concurrently
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=8)
+
+        # used to fetch the pages of list responses. This is separate from
+        # the above since lists may themselves be fetched on that pool, and
+        # waiting on work queued behind ourselves could deadlock
+        self._page_pool = concurrent.futures.ThreadPoolExecutor(max_workers=8)
+
+    def _urlopen(self, request, redirects=0):
+        """Open a request, reusing an existing connection if possible.
+
+        This is a minimal version of ``urllib.request.urlopen`` that keeps
+        connections alive between requests. We defer to urllib if a proxy is
+        configured.
+        """
+        import http.client
+        import threading
+        import urllib.error
+        import urllib.request
+
+        parsed = urllib.parse.urlsplit(request.full_url)
+        if parsed.scheme in urllib.request.getproxies():
+            return urllib.request.urlopen(request)
+
+        path = parsed.path or '/'
+        if parsed.query:
+            path = f'{path}?{parsed.query}'
+
+        # connections can't be shared between threads
+        key = (threading.get_ident(), parsed.scheme, parsed.netloc)
+        for attempt in (0, 1):
+            conn = self._connections.get(key)
+            if conn is None:
+                if parsed.scheme == 'https':
+                    conn = http.client.HTTPSConnection(parsed.netloc)
+                else:
+                    conn = http.client.HTTPConnection(parsed.netloc)
+                self._connections[key] = conn
+
+            try:
+                conn.request(
+                    request.get_method(),
+                    path,
+                    body=request.data,
+                    headers=dict(request.header_items()),
+                )
+                resp = conn.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionError):
+                # the server may have closed an idle connection, so retry
+                # once using a fresh one. We can't tell whether the server
+                # acted on the request first though, so only do this for
+                # requests that are safe to repeat
+                conn.close()
+                del self._connections[key]
+                if attempt or request.get_method() != 'GET':
+                    raise
+            else:
+                break
+
+        location = resp.getheader('Location')
+        if (
+            request.get_method() == 'GET'
+            and resp.status in (301, 302, 303, 307, 308)
+            and location
+            and redirects < urllib.request.HTTPRedirectHandler.max_redirections
+        ):
+            resp.read()
+            return self._urlopen(
+                urllib.request.Request(
+                    url=urllib.parse.urljoin(request.full_url, location),
+                    method='GET',
+                    headers=dict(request.header_items()),
+                ),
+                redirects + 1,
+            )
+
+        # we only follow redirects for GET requests, as urllib does, and only
+        # so many of those. Anything else we'd otherwise mistake for success;
+        # the exception is a 304 in reply to a conditional GET
+        if resp.status >= 400 or (
+            300 <= resp.status < 400 and resp.status != 304
+        ):
+            # read the body so the connection can be reused
+            raise urllib.error.HTTPError(
+                request.full_url,
+                resp.status,
+                resp.reason,
+                resp.headers,
+                io.BytesIO(resp.read()),
+            )
+
+        return resp
+
+    @functools.cached_property
+    def _base_headers(self):
+        """The headers sent with every request.
+
+        These don't change over the lifetime of the client so we only
+        generate them once.
+        """
+        # imported here since looking up the version is relatively expensive
+        from . import __version__
+
         headers = {
             'User-Agent': f'pwclient ({__version__})',
         }
@@ -463,23 +1096,70 @@ class REST(API):
             ).decode('ascii')
             headers['Authorization'] = f'Basic {credentials}'
 
-        if additional_headers:
-            headers = dict(headers, **additional_headers)
-
         return headers
 
-    def _get(self, url):
+    def _generate_headers(self, additional_headers=None):
+        return dict(self._base_headers, **(additional_headers or {}))
+
+    def _request(self, method, url, data=None, *, out_fp=None):
+        """Make a request to the API.
+
+        :param method: The HTTP method to use.
+        :param url: The URL to request.
+        :param data: An optional object to send as the JSON request body.
+        :param out_fp: An optional binary file object to stream the response
+            body to, rather than returning it.
+        :returns: A tuple of the response body and the response headers.
+        """
+        import http
+        import shutil
+        import urllib.error
+        import urllib.request
+
+        if data is not None:
+            data = _json_dumps(data)
+            headers = self._generate_headers(
+                {
+                    'Content-Type': 'application/json',
+                },
+            )
+        else:
+            headers = self._generate_headers()
+
+        # if we've seen this resource before, ask the server to only send it
+        # again if it has changed
+        cacheable = method == 'GET' and not out_fp
+        cached = None
+        if cacheable:
+            with self._responses_lock:
+                cached = self._responses.get(url)
+                if cached:
+                    self._responses.move_to_end(url)
+        if cached:
+            headers.update(cached[0])
+
         request = urllib.request.Request(
-            url=url, method='GET', headers=self._generate_headers()
+            url=url, data=data, method=method, headers=headers
         )
         try:
-            with urllib.request.urlopen(request) as resp:
-                data = resp.read()
-                headers = resp.getheaders()
+            with self._urlopen(request) as resp:
+                if cached and resp.status == http.HTTPStatus.NOT_MODIFIED:
+                    return cached[1], cached[2]
+
+                if out_fp:
+                    shutil.copyfileobj(resp, out_fp, 64 * 1024)
+                    data = None
+                else:
+                    data = resp.read()
+                headers = resp.headers
         except urllib.error.HTTPError as exc:
+            # urllib, which we use with proxies, treats this as an error
+            if cached and exc.status == http.HTTPStatus.NOT_MODIFIED:
+                return cached[1], cached[2]
+
             # the XML-RPC API returns an empty body, annoyingly, so we must
             # emulate this
-            if exc.status == http.HTTPStatus.NOT_FOUND:
+            if method == 'GET' and exc.status == http.HTTPStatus.NOT_FOUND:
                 return {}, {}
 
             sys.stderr.write('Request failed\n\n')
@@ -487,53 +1167,69 @@ class REST(API):
             sys.stderr.write(exc.read().decode('utf-8'))
             sys.exit(1)
 
+        if cacheable:
+            validators = {}
+            if headers.get('ETag'):
+                validators['If-None-Match'] = headers['ETag']
+            if headers.get('Last-Modified'):
+                validators['If-Modified-Since'] = headers['Last-Modified']
+            if validators:
+                with self._responses_lock:
+                    self._responses[url] = (validators, data, headers)
+                    self._responses.move_to_end(url)
+                    if len(self._responses) > RESPONSE_CACHE_SIZE:
+                        self._responses.popitem(last=False)
+
         return data, headers
 
-    def _post(self, url, data):
-        request = urllib.request.Request(
-            url=url,
-            data=json.dumps(data).encode('utf-8'),
-            method='POST',
-            headers=self._generate_headers(
-                {
-                    'Content-Type': 'application/json',
-                },
-            ),
-        )
-        try:
-            with urllib.request.urlopen(request) as resp:
-                data = resp.read()
-                headers = resp.getheaders()
-        except urllib.error.HTTPError as exc:
-            sys.stderr.write('Request failed\n\n')
-            sys.stderr.write('Response:\n')
-            sys.stderr.write(exc.read().decode('utf-8'))
-            sys.exit(1)
+    def _get(self, url, out_fp=None):
+        return self._request('GET', url, out_fp=out_fp)
 
-        return data, headers
+    def _post(self, url, data):
+        return self._request('POST', url, data)
 
     def _put(self, url, data):
-        request = urllib.request.Request(
-            url=url,
-            data=json.dumps(data).encode('utf-8'),
-            method='PATCH',
-            headers=self._generate_headers(
-                {
-                    'Content-Type': 'application/json',
-                },
-            ),
-        )
-        try:
-            with urllib.request.urlopen(request) as resp:
-                data = resp.read()
-                headers = resp.getheaders()
-        except urllib.error.HTTPError as exc:
-            sys.stderr.write('Request failed\n\n')
-            sys.stderr.write('Response:\n')
-            sys.stderr.write(exc.read().decode('utf-8'))
-            sys.exit(1)
+        return self._request('PATCH', url, data)
 
-        return data, headers
+    def _url(self, *path, params=None):
+        """Build the URL for a resource from its path components."""
+        url = '/'.join([self._server, *map(str, path), ''])
+        if params:
+            url = f'{url}?{urllib.parse.urlencode(params)}'
+        return url
+
+    @staticmethod
+    def _next_url(headers):
+        """Get the URL of the next page from a Link header, if any."""
+        match = LINK_NEXT_RE.search(headers.get('Link', ''))
+        return match.group(1) if match else None
+
+    @staticmethod
+    def _page_urls(headers):
+        """Get the URLs of every page after the first from a Link header.
+
+        This is only possible if the server tells us which page is the last.
+        """
+        match = LINK_LAST_RE.search(headers.get('Link', ''))
+        if not match:
+            return []
+
+        url = urllib.parse.urlsplit(match.group(1))
+        query = urllib.parse.parse_qs(url.query)
+        last_page = int(query.get('page', ['1'])[0])
+
+        urls = []
+        for page in range(2, last_page + 1):
+            query['page'] = [str(page)]
+            urls.append(
+                urllib.parse.urlunsplit(
+                    url._replace(
+                        query=urllib.parse.urlencode(query, doseq=True)
+                    )
+                )
+            )
+
+        return urls
 
     def _create(
         self,
@@ -543,11 +1239,12 @@ class REST(API):
         resource_id=None,
         subresource_type=None,
     ):
-        url = f'{self._server}/{resource_type}/'
         if resource_id:
-            url = f'{url}{resource_id}/{subresource_type}/'
+            url = self._url(resource_type, resource_id, subresource_type)
+        else:
+            url = self._url(resource_type)
         data, _ = self._post(url, data)
-        return json.loads(data)
+        return _json_loads(data)
 
     def _update(
         self,
@@ -558,11 +1255,14 @@ class REST(API):
         subresource_type=None,
         subresource_id=None,
     ):
-        url = f'{self._server}/{resource_type}/{resource_id}/'
         if subresource_id:
-            url = f'{url}{subresource_type}/{subresource_id}/'
+            url = self._url(
+                resource_type, resource_id, subresource_type, subresource_id
+            )
+        else:
+            url = self._url(resource_type, resource_id)
         data, _ = self._put(url, data)
-        return json.loads(data)
+        return _json_loads(data)
 
     def _detail(
         self,
@@ -573,13 +1273,18 @@ class REST(API):
         subresource_type=None,
         subresource_id=None,
     ):
-        url = f'{self._server}/{resource_type}/{resource_id}/'
         if subresource_type:
-            url = f'{url}{subresource_type}/{subresource_id}/'
-        if params:
-            url = f'{url}?{urllib.parse.urlencode(params)}'
+            url = self._url(
+                resource_type,
+                resource_id,
+                subresource_type,
+                subresource_id,
+                params=params,
+            )
+        else:
+            url = self._url(resource_type, resource_id, params=params)
         data, _ = self._get(url)
-        return json.loads(data)
+        return _json_loads(data)
 
     def _list(
         self,
@@ -588,14 +1293,44 @@ class REST(API):
         *,
         resource_id=None,
         subresource_type=None,
+        paginate=True,
+        max_count=None,
     ):
-        url = f'{self._server}/{resource_type}/'
         if resource_id:
-            url = f'{url}{resource_id}/{subresource_type}/'
-        if params:
-            url = f'{url}?{urllib.parse.urlencode(params)}'
-        data, _ = self._get(url)
-        return json.loads(data)
+            url = self._url(
+                resource_type, resource_id, subresource_type, params=params
+            )
+        else:
+            url = self._url(resource_type, params=params)
+        data, headers = self._get(url)
+        items = _json_loads(data)
+
+        if not paginate:
+            return items
+
+        # list responses are paginated. If the server tells us how many pages
+        # there are we can fetch the remaining pages in parallel, otherwise
+        # (as with Patchwork itself) we must follow the 'next' links in turn
+        page_urls = self._page_urls(headers)
+        if page_urls:
+            if max_count and items:
+                # pages are the same size so we know how many we need
+                pages = -(-max_count // len(items))
+                page_urls = page_urls[: pages - 1]
+
+            for data, _ in self._page_pool.map(self._get, page_urls):
+                items.extend(_json_loads(data))
+        else:
+            url = self._next_url(headers)
+            while url and not (max_count and len(items) >= max_count):
+                data, headers = self._get(url)
+                items.extend(_json_loads(data))
+                url = self._next_url(headers)
+
+        if max_count:
+            return items[:max_count]
+
+        return items
 
     # project
 
@@ -645,8 +1380,8 @@ class REST(API):
         return {
             'id': obj['id'],
             'email': obj['email'],
-            'name': obj['name'] if obj['name'] else obj['email'],
-            'user': obj['user']['username'] if obj['username'] else '',
+            'name': obj['name'] or obj['email'],
+            'user': obj['user']['username'] if obj['user'] else '',
         }
 
     def person_list(self, search_str=None, max_count=0):
@@ -675,41 +1410,10 @@ class REST(API):
         """Serialize a patch response.
 
         Return a trimmed down dictionary representation of the API response
-        that matches what we got from the XML-RPC API.
+        that matches what we got from the XML-RPC API. Fields are only
+        computed when accessed, since callers rarely need all of them.
         """
-
-        def _format_person(person):
-            if not person:
-                return ''
-
-            if person['name']:
-                return f"{person['name']} <{person['email']}>"
-            return person['email']
-
-        def _format_user(user):
-            if not user:
-                return ''
-
-            return user['username']
-
-        return {
-            'id': obj['id'],
-            'date': obj['date'],
-            'filename': obj.get('filename') or '',
-            'msgid': obj['msgid'],
-            'name': obj['name'],
-            'project': obj['project']['name'],
-            'project_id': obj['project']['id'],
-            'state': obj['state'],
-            'state_id': '',  # NOTE: this isn't exposed
-            'archived': obj['archived'],
-            'submitter': _format_person(obj['submitter']),
-            'submitter_id': obj['submitter']['id'],
-            'delegate': _format_user(obj['delegate']),
-            'delegate_id': obj['delegate']['id'] if obj['delegate'] else '',
-            'commit_ref': obj['commit_ref'] or '',
-            'hash': obj['hash'] or '',
-        }
+        return _PatchView(obj)
 
     def patch_list(
         self,
@@ -723,17 +1427,11 @@ class REST(API):
         hash,
         max_count=None,
     ):
-        # we could implement these but we don't need them
-        if max_count:
-            raise NotImplementedError(
-                'The max_count parameter is not supported',
-            )
-
         filters = {}
 
         if state is not None:
             # we slugify this since that's what the API expects
-            filters['state'] = state.lower().replace(' ', '-')
+            filters['state'] = state.lower().translate(SLUG_TABLE)
 
         if project is not None:
             filters['project'] = project
@@ -747,41 +1445,74 @@ class REST(API):
         if archived is not None:
             filters['archived'] = archived
 
-        patches = self._list('patches', params=filters)
+        # patches are listed oldest first, so to get the last N we must list
+        # them newest first and flip the result
+        if max_count and max_count < 0:
+            filters['order'] = '-id'
+
+        patches = self._list(
+            'patches',
+            params=filters,
+            max_count=abs(max_count) if max_count else None,
+        )
+        if max_count and max_count < 0:
+            patches.reverse()
+
         return [self._patch_to_dict(patch) for patch in patches]
 
     def patch_get(self, patch_id):
         patch = self._detail('patches', patch_id)
         return self._patch_to_dict(patch)
 
+    def patch_get_many(self, patch_ids):
+        return list(self._pool.map(self._patch_get_or_error, patch_ids))
+
     def patch_get_by_hash(self, hash):
-        patches = self._list('patches', {'hash': hash})
+        # we only need to know if there's exactly one match, so there's no
+        # point fetching more than two
+        patches = self._list(
+            'patches', {'hash': hash, 'per_page': 2}, paginate=False
+        )
         if len(patches) != 1:
             return {}  # emulate xmlrpc behavior
         return self._patch_to_dict(patches[0])
 
     def patch_get_by_project_hash(self, project, hash):
-        patches = self._list('patches', {'project': project, 'hash': hash})
+        patches = self._list(
+            'patches',
+            {'project': project, 'hash': hash, 'per_page': 2},
+            paginate=False,
+        )
         if len(patches) != 1:
             return {}  # emulate xmlrpc behavior
         return self._patch_to_dict(patches[0])
 
-    def patch_get_mbox(self, patch_id):
+    def patch_get_by_project_hash_many(self, project, hashes):
+        return list(
+            self._pool.map(
+                functools.partial(self.patch_get_by_project_hash, project),
+                hashes,
+            )
+        )
+
+    def patch_get_mbox(self, patch_id, out_fp=None):
         patch = self._detail('patches', patch_id)
-        data, headers = self._get(patch['mbox'])
-        header = ''
-        for name, value in headers:
-            if name.lower() == 'content-disposition':
-                header = value
-                break
-        header_re = re.search('filename=(.+)', header)
+        data, headers = self._get(patch['mbox'], out_fp=out_fp)
+        header = headers.get('Content-Disposition', '')
+        header_re = FILENAME_RE.search(header)
         if not header_re:
             raise Exception('filename header was missing from the response')
 
         filename = header_re.group(1)[:-6]  # remove the extension
 
+        if out_fp:
+            return None, filename
+
         return data.decode('utf-8'), filename
 
+    def patch_get_mbox_many(self, patch_ids):
+        return list(self._pool.map(self._patch_get_mbox_or_none, patch_ids))
+
     def patch_get_diff(self, patch_id):
         patch = self._detail('patches', patch_id)
         return patch['diff']
@@ -797,7 +1528,7 @@ class REST(API):
 
         if state is not None:
             # we slugify this since that's what the API expects
-            params['state'] = state.lower().replace(' ', '-')
+            params['state'] = state.lower().translate(SLUG_TABLE)
 
         if commit_ref is not None:
             params['commit_ref'] = commit_ref
@@ -854,8 +1585,9 @@ class REST(API):
             filters['user'] = user
 
         # this is icky, but alas we don't provide this information in the
-        # response
-        patch = self._detail(
+        # response. Fetch it concurrently with the checks, at least
+        patch = self._pool.submit(
+            self._detail,
             'patches',
             patch_id,
         )
@@ -865,6 +1597,7 @@ class REST(API):
             resource_id=patch_id,
             subresource_type='checks',
         )
+        patch = patch.result()
         return [self._check_to_dict(check, patch) for check in checks]
 
     def check_get(self, patch_id, check_id):
@@ -875,8 +1608,9 @@ class REST(API):
             )
 
         # this is icky, but alas we don't provide this information in the
-        # response
-        patch = self._detail(
+        # response. Fetch it concurrently with the check, at least
+        patch = self._pool.submit(
+            self._detail,
             'patches',
             patch_id,
         )
@@ -886,6 +1620,7 @@ class REST(API):
             subresource_type='checks',
             subresource_id=check_id,
         )
+        patch = patch.result()
         return self._check_to_dict(check, patch)
 
     def check_create(
@@ -7,27 +7,28 @@
 import re
 import sys
 
-from . import exceptions
+FORMAT_FIELD_RE = re.compile('%{([a-z0-9_]+)}')
 
 
 def action_list(api, patch_id=None, user=None):
     checks = api.check_list(patch_id, user)
-    print("%-5s %-16s %-8s %s" % ("ID", "Context", "State", "Patch"))
-    print("%-5s %-16s %-8s %s" % ("--", "-------", "-----", "-----"))
-    for check in checks:
-        print(
-            "%-5s %-16s %-8s %s"
-            % (check['id'], check['context'], check['state'], check['patch'])
-        )
+    fmt = "%-5s %-16s %-8s %s\n"
+    sys.stdout.write(fmt % ("ID", "Context", "State", "Patch"))
+    sys.stdout.write(fmt % ("--", "-------", "-----", "-----"))
+    sys.stdout.writelines(
+        fmt % (check['id'], check['context'], check['state'], check['patch'])
+        for check in checks
+    )
 
 
 def action_info(api, patch_id, check_id):
     check = api.check_get(patch_id, check_id)
     s = "Information for check id %d" % (check_id)
-    print(s)
-    print('-' * len(s))
-    for key, value in sorted(check.items()):
-        print("- %- 14s: %s" % (key, value))
+    lines = [s, '-' * len(s)]
+    lines.extend(
+        "- %- 14s: %s" % (key, value) for key, value in sorted(check.items())
+    )
+    sys.stdout.write('\n'.join(lines) + '\n')
 
 
 def action_get(api, patch_id, format_str=None):
@@ -36,31 +37,55 @@ def action_get(api, patch_id, format_str=None):
         return
 
     if format_str:
-        format_field_re = re.compile('%{([a-z0-9_]+)}')
+        # translate the format string once into a str.format template,
+        # escaping any literal braces, rather than running the regex for
+        # every check
+        tokens = FORMAT_FIELD_RE.split(format_str)
 
-        def check_field(matchobj):
-            fieldname = matchobj.group(1)
+        # all checks have the same fields, so validate them once up front
+        if checks:
+            unknown = set(tokens[1::2]) - checks[0].keys()
+            if unknown:
+                sys.stderr.write(
+                    "Unknown format field(s): %s\n"
+                    % ', '.join(sorted(unknown))
+                )
+                sys.exit(1)
 
-            return str(check[fieldname])
+        for i in range(0, len(tokens), 2):
+            tokens[i] = tokens[i].replace('{', '{{').replace('}', '}}')
+        for i in range(1, len(tokens), 2):
+            tokens[i] = '{%s!s}' % tokens[i]
+        template = ''.join(tokens) + '\n'
 
-        for check in checks:
-            print(format_field_re.sub(check_field, format_str))
+        sys.stdout.writelines(template.format_map(check) for check in checks)
     else:
         s = "Check information for patch id %d" % patch_id
         print(s)
         print('-' * len(s))
         out = []
         for check in checks:
-            cout = []
-            for key, value in sorted(check.items()):
-                value = ' ' + str(value) if value else value
-                cout.append("- %- 14s:%s" % (key, value))
-            out.append("\n".join(cout))
-        print("\n\n".join(out))
+            out.append(
+                "\n".join(
+                    "- %- 14s:%s" % (key, ' ' + str(value) if value else value)
+                    for key, value in sorted(check.items())
+                )
+            )
+        sys.stdout.write("\n\n".join(out) + "\n")
+
 
+def action_create_many(api, patch_ids, context, state, url, description):
+    checks = [
+        {
+            'patch_id': patch_id,
+            'context': context,
+            'state': state,
+            'target_url': url,
+            'description': description,
+        }
+        for patch_id in patch_ids
+    ]
 
-def action_create(api, patch_id, context, state, url, description):
-    try:
-        api.check_create(patch_id, context, state, url, description)
-    except exceptions.APIError as exc:
-        sys.stderr.write(str(exc))
+    for error in api.check_create_many(checks):
+        if error:
+            sys.stderr.write(str(error) + '\n')
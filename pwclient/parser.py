@@ -5,8 +5,10 @@
 # SPDX-License-Identifier: GPL-2.0-or-later
 
 import argparse
+import functools
 
 
+@functools.lru_cache(maxsize=None)
 def _get_hash_parser():
     hash_parser = argparse.ArgumentParser(add_help=False)
     hash_parser.add_argument(
@@ -46,6 +48,7 @@ class BooleanStringAction(argparse.Action):
         setattr(namespace, self.dest, values == 'yes')
 
 
+@functools.lru_cache(maxsize=None)
 def _get_filter_parser():
     filter_parser = argparse.ArgumentParser(add_help=False)
     filter_parser.add_argument(
@@ -64,19 +67,19 @@ def _get_filter_parser():
         '-p',
         '--project',
         metavar='PROJECT',
-        help="filter by project name (see 'projects' for list)",
+        help="filter by project name or ID (see 'projects' for list)",
     )
     filter_parser.add_argument(
         '-w',
         '--submitter',
         metavar='WHO',
-        help="filter by submitter (name, e-mail substring search)",
+        help="filter by submitter (name, e-mail substring search or ID)",
     )
     filter_parser.add_argument(
         '-d',
         '--delegate',
         metavar='WHO',
-        help="filter by delegate (name, e-mail substring search)",
+        help="filter by delegate (name, e-mail substring search or ID)",
     )
     filter_parser.add_argument(
         '-n',
@@ -118,35 +121,20 @@ def _get_filter_parser():
     return filter_parser
 
 
-def get_parser():
-    hash_parser = _get_hash_parser()
-    filter_parser = _get_filter_parser()
-
-    action_parser = argparse.ArgumentParser(
-        prog='pwclient',
-        formatter_class=argparse.RawTextHelpFormatter,
-        epilog="""Use 'pwclient <command> --help' for more info.
-
-To avoid unicode encode/decode errors, you should export the LANG or LC_ALL
-environment variables according to the configured locales on your system. If
-these variables are already set, make sure that they point to valid and
-installed locales.
-""",
-    )
-
-    subparsers = action_parser.add_subparsers(title='Commands')
-
+def _add_apply_parser(subparsers):
     apply_parser = subparsers.add_parser(
         'apply',
-        parents=[hash_parser],
+        parents=[_get_hash_parser()],
         conflict_handler='resolve',
         help="apply a patch in the current directory using 'patch -p1'",
     )
     apply_parser.set_defaults(subcmd='apply')
 
+
+def _add_git_am_parser(subparsers):
     git_am_parser = subparsers.add_parser(
         'git-am',
-        parents=[hash_parser],
+        parents=[_get_hash_parser()],
         conflict_handler='resolve',
         help="apply a patch to current git branch using 'git am'",
     )
@@ -172,30 +160,38 @@ installed locales.
     )
     git_am_parser.set_defaults(subcmd='git_am')
 
+
+def _add_get_parser(subparsers):
     get_parser = subparsers.add_parser(
         'get',
-        parents=[hash_parser],
+        parents=[_get_hash_parser()],
         conflict_handler='resolve',
         help="download a patch and save it locally",
     )
     get_parser.set_defaults(subcmd='get')
 
+
+def _add_info_parser(subparsers):
     info_parser = subparsers.add_parser(
         'info',
-        parents=[hash_parser],
+        parents=[_get_hash_parser()],
         conflict_handler='resolve',
         help="show information for a given patch ID",
     )
     info_parser.set_defaults(subcmd='info')
 
+
+def _add_projects_parser(subparsers):
     projects_parser = subparsers.add_parser(
         'projects', help="list all projects"
     )
     projects_parser.set_defaults(subcmd='projects')
 
+
+def _add_check_get_parser(subparsers):
     check_get_parser = subparsers.add_parser(
         'check-get',
-        parents=[hash_parser],
+        parents=[_get_hash_parser()],
         conflict_handler='resolve',
         help="get checks for a patch",
     )
@@ -210,6 +206,8 @@ installed locales.
     )
     check_get_parser.set_defaults(subcmd='check_get')
 
+
+def _add_check_list_parser(subparsers):
     check_list_parser = subparsers.add_parser(
         'check-list', help="list all checks"
     )
@@ -231,6 +229,8 @@ installed locales.
     )
     check_list_parser.set_defaults(subcmd='check_list')
 
+
+def _add_check_info_parser(subparsers):
     check_info_parser = subparsers.add_parser(
         'check-info',
         help="show information for a given check",
@@ -253,9 +253,11 @@ installed locales.
     )
     check_info_parser.set_defaults(subcmd='check_info')
 
+
+def _add_check_create_parser(subparsers):
     check_create_parser = subparsers.add_parser(
         'check-create',
-        parents=[hash_parser],
+        parents=[_get_hash_parser()],
         conflict_handler='resolve',
         help="add a check to a patch",
     )
@@ -271,22 +273,28 @@ installed locales.
     )
     check_create_parser.set_defaults(subcmd='check_create')
 
+
+def _add_states_parser(subparsers):
     states_parser = subparsers.add_parser(
         'states', help="show list of potential patch states"
     )
     states_parser.set_defaults(subcmd='states')
 
+
+def _add_view_parser(subparsers):
     view_parser = subparsers.add_parser(
         'view',
-        parents=[hash_parser],
+        parents=[_get_hash_parser()],
         conflict_handler='resolve',
         help="view a patch",
     )
     view_parser.set_defaults(subcmd='view')
 
+
+def _add_update_parser(subparsers):
     update_parser = subparsers.add_parser(
         'update',
-        parents=[hash_parser],
+        parents=[_get_hash_parser()],
         conflict_handler='resolve',
         help="update patch",
         epilog="using a COMMIT-REF allows for only one ID to be specified",
@@ -311,18 +319,70 @@ installed locales.
     )
     update_parser.set_defaults(subcmd='update')
 
+
+def _add_list_parser(subparsers):
     list_parser = subparsers.add_parser(
         'list',
-        parents=[filter_parser],
+        parents=[_get_filter_parser()],
         help='list patches using optional filters',
     )
     list_parser.set_defaults(subcmd='list')
 
+
+def _add_search_parser(subparsers):
     # Poor man's argparse aliases: we register the "search" parser but
     # effectively use "list" for the help-text.
     search_parser = subparsers.add_parser(
-        'search', parents=[filter_parser], help="alias for 'list'"
+        'search', parents=[_get_filter_parser()], help="alias for 'list'"
     )
     search_parser.set_defaults(subcmd='list')
 
+
+SUBCOMMANDS = {
+    'apply': _add_apply_parser,
+    'git-am': _add_git_am_parser,
+    'get': _add_get_parser,
+    'info': _add_info_parser,
+    'projects': _add_projects_parser,
+    'check-get': _add_check_get_parser,
+    'check-list': _add_check_list_parser,
+    'check-info': _add_check_info_parser,
+    'check-create': _add_check_create_parser,
+    'states': _add_states_parser,
+    'view': _add_view_parser,
+    'update': _add_update_parser,
+    'list': _add_list_parser,
+    'search': _add_search_parser,
+}
+
+
+def get_parser(subcmd=None):
+    """Build the argument parser.
+
+    :param subcmd: The name of a subcommand. If given, only the parser for
+        that subcommand is fully built, since building every subparser is the
+        most expensive part of start up. The others are registered as empty
+        placeholders so that usage and error messages still list every
+        subcommand. If it's not a known subcommand, all subparsers are built.
+    """
+    action_parser = argparse.ArgumentParser(
+        prog='pwclient',
+        formatter_class=argparse.RawTextHelpFormatter,
+        epilog="""Use 'pwclient <command> --help' for more info.
+
+To avoid unicode encode/decode errors, you should export the LANG or LC_ALL
+environment variables according to the configured locales on your system. If
+these variables are already set, make sure that they point to valid and
+installed locales.
+""",
+    )
+
+    subparsers = action_parser.add_subparsers(title='Commands')
+
+    for name, add_parser in SUBCOMMANDS.items():
+        if subcmd in SUBCOMMANDS and name != subcmd:
+            subparsers.add_parser(name, add_help=False)
+        else:
+            add_parser(subparsers)
+
     return action_parser
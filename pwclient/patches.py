@@ -4,17 +4,27 @@
 #
 # SPDX-License-Identifier: GPL-2.0-or-later
 
+import collections
 import io
 import itertools
 import os
 import re
-import subprocess
 import sys
 
+FORMAT_FIELD_RE = re.compile('%{([a-z0-9_]+)}')
 
-def patch_id_from_hash(api, project, hash):
-    patch = api.patch_get_by_project_hash(project, hash)
 
+def patch_ids_from_hashes(api, project, hashes):
+    # only look up each distinct hash once
+    unique_hashes = list(dict.fromkeys(hashes))
+    patches = api.patch_get_by_project_hash_many(project, unique_hashes)
+    patch_ids = {
+        hash: _patch_id(patch) for hash, patch in zip(unique_hashes, patches)
+    }
+    return [patch_ids[hash] for hash in hashes]
+
+
+def _patch_id(patch):
     if patch == {}:
         sys.stderr.write("No patch has the hash provided\n")
         sys.exit(1)
@@ -30,30 +40,36 @@ def patch_id_from_hash(api, project, hash):
 
 
 def _list_patches(patches, format_str=None):
-    """Dump a list of patches to stdout."""
+    """Dump an iterable of patches to stdout."""
     if format_str:
-        format_field_re = re.compile("%{([a-z0-9_]+)}")
-
-        def patch_field(matchobj):
-            fieldname = matchobj.group(1)
-
-            if fieldname == "_msgid_":
-                # naive way to strip < and > from message-id
-                val = str(patch["msgid"]).strip("<>")
-            else:
-                val = str(patch[fieldname])
-
-            return val
+        # translate the format string once into a str.format template,
+        # escaping any literal braces, rather than running the regex for
+        # every patch
+        tokens = FORMAT_FIELD_RE.split(format_str)
+        fieldnames = set(tokens[1::2])
+        for i in range(0, len(tokens), 2):
+            tokens[i] = tokens[i].replace('{', '{{').replace('}', '}}')
+        for i in range(1, len(tokens), 2):
+            tokens[i] = '{%s!s}' % tokens[i]
+        template = ''.join(tokens) + '\n'
+
+        if '_msgid_' in fieldnames:
+            # naive way to strip < and > from message-id
+            patches = (
+                collections.ChainMap(
+                    {'_msgid_': str(patch['msgid']).strip('<>')}, patch
+                )
+                for patch in patches
+            )
 
-        for patch in patches:
-            print(format_field_re.sub(patch_field, format_str))
+        sys.stdout.writelines(template.format_map(patch) for patch in patches)
     else:
-        print("%-7s %-12s %s" % ("ID", "State", "Name"))
-        print("%-7s %-12s %s" % ("--", "-----", "----"))
-        for patch in patches:
-            print(
-                "%-7d %-12s %s" % (patch['id'], patch['state'], patch['name'])
-            )
+        sys.stdout.write("%-7s %-12s %s\n" % ("ID", "State", "Name"))
+        sys.stdout.write("%-7s %-12s %s\n" % ("--", "-----", "----"))
+        sys.stdout.writelines(
+            "%-7d %-12s %s\n" % (patch['id'], patch['state'], patch['name'])
+            for patch in patches
+        )
 
 
 def action_list(
@@ -95,7 +111,7 @@ def action_list(
             patches, key=lambda x: x['submitter']
         ):
             print(f'Patches submitted by {person}:')
-            _list_patches(list(person_patches), format_str)
+            _list_patches(person_patches, format_str)
 
         return
 
@@ -109,7 +125,7 @@ def action_list(
             patches, key=lambda x: x['delegate']
         ):
             print(f'Patches delegated to {delegate}:')
-            _list_patches(list(delegate_patches), format_str)
+            _list_patches(delegate_patches, format_str)
 
         return
 
@@ -117,26 +133,32 @@ def action_list(
     _list_patches(patches, format_str)
 
 
-def action_info(api, patch_id):
-    try:
-        patch = api.patch_get(patch_id)
-    except Exception as exc:
-        print(str(exc), file=sys.stderr)
-        sys.exit(1)
+def action_info_many(api, patch_ids):
+    patch_ids = list(patch_ids)
+    for patch_id, patch in zip(patch_ids, api.patch_get_many(patch_ids)):
+        if isinstance(patch, Exception):
+            print(str(patch), file=sys.stderr)
+            sys.exit(1)
+
+        _show_info(patch_id, patch)
 
+
+def _show_info(patch_id, patch):
     s = "Information for patch id %d" % (patch_id)
-    print(s)
-    print('-' * len(s))
+    lines = [s, '-' * len(s)]
     for key, value in sorted(patch.items()):
         if value != '':
-            print("- %- 14s: %s" % (key, value))
+            lines.append("- %- 14s: %s" % (key, value))
         else:
-            print("- %- 14s:" % key)
+            lines.append("- %- 14s:" % key)
+    sys.stdout.write('\n'.join(lines) + '\n')
 
 
 def action_get(api, patch_id):
+    # fetch the mbox as bytes since we're only going to write it out again
+    mbox = io.BytesIO()
     try:
-        mbox, filename = api.patch_get_mbox(patch_id)
+        _, filename = api.patch_get_mbox(patch_id, out_fp=mbox)
     except Exception as exc:
         print(str(exc), file=sys.stderr)
         sys.exit(1)
@@ -144,58 +166,122 @@ def action_get(api, patch_id):
     base_fname = fname = os.path.basename(filename)
     fname += '.patch'
     i = 0
-    while os.path.exists(fname):
-        fname = "%s.%d.patch" % (base_fname, i)
-        i += 1
+    # rely on exclusive creation to find a free filename rather than checking
+    # for each one first, which would also be racy
+    while True:
+        try:
+            f = open(fname, 'xb')
+        except FileExistsError:
+            fname = "%s.%d.patch" % (base_fname, i)
+            i += 1
+        else:
+            break
 
-    with io.open(fname, 'x', encoding='utf-8') as f:
-        f.write(mbox)
+    with f:
+        f.write(mbox.getbuffer())
         print('Saved patch to %s' % fname)
 
 
 def action_view(api, patch_ids):
-    mboxes = []
+    pager = os.environ.get('PAGER')
+    if not pager:
+        # write each mbox straight to stdout as we get it rather than
+        # buffering them all in memory, fetching each distinct patch once
+        sys.stdout.flush()
+        for patch_id in dict.fromkeys(patch_ids):
+            try:
+                api.patch_get_mbox(patch_id, out_fp=sys.stdout.buffer)
+            except Exception:
+                # TODO(stephenfin): We skip this for historical reasons, but
+                # should we log/raise an error?
+                continue
+
+            sys.stdout.buffer.write(b'\n')
+        sys.stdout.buffer.flush()
+        return
 
-    for patch_id in patch_ids:
-        try:
-            mbox, _ = api.patch_get_mbox(patch_id)
-        except Exception:
-            # TODO(stephenfin): We skip this for historical reasons, but should
-            # we log/raise an error?
-            continue
+    # only fetch each distinct patch once, but show them in the order given
+    unique_ids = list(dict.fromkeys(patch_ids))
+    results = dict(zip(unique_ids, api.patch_get_mbox_many(unique_ids)))
 
-        mboxes.append(mbox)
+    # TODO(stephenfin): We skip patches we can't fetch for historical
+    # reasons, but should we log/raise an error?
+    mboxes = [
+        results[patch_id][0]
+        for patch_id in patch_ids
+        if results[patch_id] is not None
+    ]
 
     if not mboxes:
         return
 
-    pager = os.environ.get('PAGER')
-    if pager:
-        # TODO(stephenfin): Use as a context manager when we drop support for
-        # Python 2.7
-        pager = subprocess.Popen(pager.split(), stdin=subprocess.PIPE)
-        try:
-            pager.communicate(input='\n'.join(mboxes).encode('utf-8'))
-        finally:
-            if pager.stdout:
-                pager.stdout.close()
-            if pager.stderr:
-                pager.stderr.close()
-            if pager.stdin:
-                pager.stdin.close()
-            pager.wait()
-    else:
-        for mbox in mboxes:
-            print(mbox)
-
+    # deferred since we only need this for a couple of actions
+    import subprocess
 
-def action_apply(api, patch_id, apply_cmd=None):
+    # write each mbox to the pager in turn rather than joining and encoding
+    # them all up front
+    pager = subprocess.Popen(pager.split(), stdin=subprocess.PIPE)
     try:
-        patch = api.patch_get(patch_id)
-    except Exception as exc:
-        print(str(exc), file=sys.stderr)
-        sys.exit(1)
-
+        for index, mbox in enumerate(mboxes):
+            if index:
+                pager.stdin.write(b'\n')
+            pager.stdin.write(mbox.encode('utf-8'))
+    except BrokenPipeError:
+        pass  # the user quit the pager before reading everything
+    finally:
+        try:
+            pager.stdin.close()
+        except BrokenPipeError:
+            pass
+        pager.wait()
+
+
+def action_apply_many(api, patch_ids, apply_cmd=None):
+    """Apply patches in order, stopping at the first failure.
+
+    Returns the exit status of the command that failed, or 0.
+    """
+    patch_ids = list(patch_ids)
+    if not patch_ids:
+        return 0
+
+    # deferred since we only need this for a couple of actions
+    import concurrent.futures
+
+    # the patches must be applied one after another, but we can fetch the
+    # next patch while the current one is being applied. We only use a single
+    # worker so there is never more than one request in flight, since the
+    # XML-RPC transport isn't thread-safe
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(_get_patch_and_mbox, api, patch_ids[0])
+        for index, patch_id in enumerate(patch_ids):
+            try:
+                patch, mbox = future.result()
+            except Exception as exc:
+                print(str(exc), file=sys.stderr)
+                sys.exit(1)
+
+            if index + 1 < len(patch_ids):
+                future = executor.submit(
+                    _get_patch_and_mbox, api, patch_ids[index + 1]
+                )
+
+            ret = _run_apply(_describe_apply(patch_id, patch, apply_cmd), mbox)
+            if ret:
+                return ret
+
+    return 0
+
+
+def _get_patch_and_mbox(api, patch_id):
+    # fetch the mbox first since, for XML-RPC, this also fetches and caches
+    # the patch
+    mbox = io.BytesIO()
+    api.patch_get_mbox(patch_id, out_fp=mbox)
+    return api.patch_get(patch_id), mbox.getvalue()
+
+
+def _describe_apply(patch_id, patch, apply_cmd):
     if apply_cmd is None:
         print('Applying patch #%d to current directory' % patch_id)
         apply_cmd = ['patch', '-p1']
@@ -205,33 +291,37 @@ def action_apply(api, patch_id, apply_cmd=None):
         )
 
     print('Description: %s' % patch['name'])
+    return apply_cmd
 
-    try:
-        mbox, _ = api.patch_get_mbox(patch_id)
-    except Exception as exc:
-        print(str(exc), file=sys.stderr)
-        sys.exit(1)
 
+def _run_apply(apply_cmd, mbox):
+    import subprocess
+
+    # flush so our output isn't interleaved with that of the command
+    sys.stdout.flush()
     proc = subprocess.Popen(apply_cmd, stdin=subprocess.PIPE)
-    proc.communicate(mbox.encode('utf-8'))
+    proc.communicate(mbox)
     return proc.returncode
 
 
-def action_update(api, patch_id, state=None, archived=None, commit_ref=None):
-    # ensure the patch actually exists first
-    try:
-        api.patch_get(patch_id)
-    except Exception as exc:
-        print(str(exc), file=sys.stderr)
-        sys.exit(1)
-
-    try:
-        api.patch_set(
-            patch_id,
-            state=state,
-            archived=archived,
-            commit_ref=commit_ref,
-        )
-    except Exception as exc:
-        print(str(exc), file=sys.stderr)
+def action_update_many(
+    api, patch_ids, state=None, archived=None, commit_ref=None
+):
+    updates = [
+        {
+            'patch_id': patch_id,
+            'state': state,
+            'archived': archived,
+            'commit_ref': commit_ref,
+        }
+        for patch_id in patch_ids
+    ]
+
+    failed = False
+    for error in api.patch_set_many(updates):
+        if error:
+            print(str(error), file=sys.stderr)
+            failed = True
+
+    if failed:
         sys.exit(1)
@@ -27,7 +27,8 @@ auth_actions = ['check_create', 'update']
 
 
 def main(argv=sys.argv[1:]):
-    action_parser = parser.get_parser()
+    # the subcommand, if any, is always the first argument
+    action_parser = parser.get_parser(argv[0] if argv else None)
 
     if not argv:
         action_parser.print_help()
@@ -137,9 +138,7 @@ def main(argv=sys.argv[1:]):
 
     patch_ids = args.id if 'id' in args and args.id else []
     if 'use_hashes' in args and args.use_hashes:
-        patch_ids = [
-            patches.patch_id_from_hash(api, project_str, x) for x in patch_ids
-        ]
+        patch_ids = patches.patch_ids_from_hashes(api, project_str, patch_ids)
     else:
         try:
             patch_ids = [int(x) for x in patch_ids]
@@ -172,19 +171,17 @@ def main(argv=sys.argv[1:]):
         patches.action_view(api, patch_ids)
 
     elif action == 'info':
-        for patch_id in patch_ids:
-            patches.action_info(api, patch_id)
+        patches.action_info_many(api, patch_ids)
 
     elif action == 'get':
         for patch_id in patch_ids:
             patches.action_get(api, patch_id)
 
     elif action == 'apply':
-        for patch_id in patch_ids:
-            ret = patches.action_apply(api, patch_id)
-            if ret:
-                sys.stderr.write("Apply failed with exit status %d\n" % ret)
-                sys.exit(1)
+        ret = patches.action_apply_many(api, patch_ids)
+        if ret:
+            sys.stderr.write("Apply failed with exit status %d\n" % ret)
+            sys.exit(1)
 
     elif action == 'git_am':
         cmd = ['git', 'am']
@@ -222,11 +219,10 @@ def main(argv=sys.argv[1:]):
         if do_msg_id:
             cmd.append('-m')
 
-        for patch_id in patch_ids:
-            ret = patches.action_apply(api, patch_id, cmd)
-            if ret:
-                sys.stderr.write("'git am' failed with exit status %d\n" % ret)
-                sys.exit(1)
+        ret = patches.action_apply_many(api, patch_ids, cmd)
+        if ret:
+            sys.stderr.write("'git am' failed with exit status %d\n" % ret)
+            sys.exit(1)
 
     elif action == 'update':
         if args.commit_ref and len(patch_ids) > 1:
@@ -242,14 +238,13 @@ def main(argv=sys.argv[1:]):
             )
             sys.exit(1)
 
-        for patch_id in patch_ids:
-            patches.action_update(
-                api,
-                patch_id,
-                state=args.state,
-                archived=args.archived,
-                commit_ref=args.commit_ref,
-            )
+        patches.action_update_many(
+            api,
+            patch_ids,
+            state=args.state,
+            archived=args.archived,
+            commit_ref=args.commit_ref,
+        )
 
     elif action == 'check_get':
         format_str = args.format
@@ -265,15 +260,14 @@ def main(argv=sys.argv[1:]):
         checks.action_info(api, patch_id, check_id)
 
     elif action == 'check_create':
-        for patch_id in patch_ids:
-            checks.action_create(
-                api,
-                patch_id,
-                args.context,
-                args.state,
-                args.target_url,
-                args.description,
-            )
+        checks.action_create_many(
+            api,
+            patch_ids,
+            args.context,
+            args.state,
+            args.target_url,
+            args.description,
+        )
 
 
 if __name__ == "__main__":
@@ -46,3 +46,13 @@ class Transport(xmlrpclib.SafeTransport):
             request_body,
             debug,
         )
+
+
+class ServerProxy(xmlrpclib.ServerProxy):
+    def __getattr__(self, name):
+        # ServerProxy generates a new method object on every attribute
+        # access; cache these so that repeated calls are cheaper
+        method = xmlrpclib.ServerProxy.__getattr__(self, name)
+        if not name.startswith('_'):
+            self.__dict__[name] = method
+        return method
@@ -1,7 +1,17 @@
+import concurrent.futures
+import http.client
+import io
+from unittest import mock
+import urllib.error
+import urllib.request
+
 import pytest
 
 from pwclient import api
 from pwclient import exceptions
+from pwclient import xmlrpc
+
+from . import fakes
 
 
 def test_xmlrpc_init__missing_username():
@@ -35,3 +45,951 @@ def test_rest_init__transform_legacy_url(capsys):
     assert (
         'Automatically converted XML-RPC URL to REST API URL.' in captured.err
     )
+
+
+@mock.patch.object(xmlrpc.xmlrpclib, 'MultiCall')
+def test_xmlrpc_patch_set_many(mock_multicall):
+    results = xmlrpc.xmlrpclib.MultiCallIterator(
+        [[True], {'faultCode': 1, 'faultString': 'nope'}]
+    )
+    mock_multicall.return_value.return_value = results
+
+    client = api.XMLRPC('https://example.com/xmlrpc')
+    errors = client.patch_set_many(
+        [
+            {'patch_id': 1, 'archived': 'yes'},
+            {'patch_id': 2, 'commit_ref': '698fa7f'},
+        ]
+    )
+
+    mock_multicall.return_value.patch_set.assert_has_calls(
+        [
+            mock.call(1, {'archived': True}),
+            mock.call(2, {'commit_ref': '698fa7f'}),
+        ]
+    )
+    assert errors[0] is None
+    assert 'Error updating patch: nope' == str(errors[1])
+
+
+@mock.patch.object(xmlrpc.xmlrpclib, 'MultiCall')
+def test_xmlrpc_check_create_many__no_multicall(mock_multicall):
+    mock_multicall.return_value.side_effect = xmlrpc.xmlrpclib.Fault(
+        1, 'method "system.multicall" is not supported'
+    )
+
+    client = api.XMLRPC('https://example.com/xmlrpc')
+    with mock.patch.object(client, 'check_create') as mock_create:
+        errors = client.check_create_many(
+            [
+                {'patch_id': 1, 'context': 'foo', 'state': 'success'},
+                {'patch_id': 2, 'context': 'foo', 'state': 'fail'},
+            ]
+        )
+
+    mock_create.assert_has_calls(
+        [
+            mock.call(patch_id=1, context='foo', state='success'),
+            mock.call(patch_id=2, context='foo', state='fail'),
+        ]
+    )
+    assert errors == [None, None]
+
+
+@mock.patch.object(xmlrpc.xmlrpclib, 'MultiCall')
+def test_xmlrpc_multicall__unsupported_remembered(mock_multicall):
+    mock_multicall.return_value.side_effect = xmlrpc.xmlrpclib.Fault(
+        1, 'method "system.multicall" is not supported'
+    )
+
+    client = api.XMLRPC('https://example.com/xmlrpc')
+
+    assert client._multicall([('patch_get', (1,))]) is None
+    assert client._multicall([('patch_get', (2,))]) is None
+
+    mock_multicall.return_value.assert_called_once_with()
+
+
+@mock.patch.object(xmlrpc.Transport, 'request')
+def test_xmlrpc_project_get__cached(mock_request):
+    mock_request.return_value = ({'id': 1, 'linkname': 'patchwork'},)
+
+    client = api.XMLRPC('https://example.com/xmlrpc')
+
+    assert client.project_get(1) == client.project_get(1)
+    mock_request.assert_called_once()
+
+    client.clear_caches()
+    client.project_get(1)
+
+    assert mock_request.call_count == 2
+
+
+@mock.patch.object(xmlrpc.Transport, 'request')
+def test_xmlrpc_patch_get__cached(mock_request):
+    mock_request.side_effect = [
+        ({'id': 1, 'name': 'foo'},),
+        (True,),
+        ({'id': 1, 'name': 'foo'},),
+    ]
+
+    client = api.XMLRPC('https://example.com/xmlrpc')
+
+    assert client.patch_get(1) == client.patch_get(1)
+    mock_request.assert_called_once()
+
+    client.patch_set(1, archived=True)
+    client.patch_get(1)
+
+    assert mock_request.call_count == 3
+
+
+@mock.patch.object(api.REST, '_urlopen')
+def test_rest_patch_get_mbox__out_fp(mock_urlopen):
+    resp = mock_urlopen.return_value.__enter__.return_value
+    resp.read.side_effect = [b'From foo', b'']
+    resp.headers = http.client.HTTPMessage()
+    resp.headers['Content-Disposition'] = 'attachment; filename=foo.patch'
+
+    client = api.REST('https://patchwork.kernel.org/api/')
+    out_fp = io.BytesIO()
+    with mock.patch.object(client, '_detail') as mock_detail:
+        mock_detail.return_value = {'mbox': 'https://example.com/mbox/'}
+        mbox, filename = client.patch_get_mbox(1, out_fp=out_fp)
+
+    assert mbox is None
+    assert filename == 'foo'
+    assert out_fp.getvalue() == b'From foo'
+
+
+@mock.patch.object(urllib.request, 'getproxies', return_value={})
+@mock.patch.object(http.client, 'HTTPSConnection')
+def test_rest_get__reuse_connection(mock_conn, mock_proxies):
+    resp = mock_conn.return_value.getresponse.return_value
+    resp.status = 200
+    resp.getheader.return_value = None
+    resp.__enter__.return_value = resp
+    resp.read.return_value = b'[]'
+
+    client = api.REST('https://patchwork.kernel.org/api/')
+    client._get('https://patchwork.kernel.org/api/patches/?hash=foo')
+    client._get('https://patchwork.kernel.org/api/projects/')
+
+    mock_conn.assert_called_once_with('patchwork.kernel.org')
+    mock_conn.return_value.request.assert_has_calls(
+        [
+            mock.call(
+                'GET', '/api/patches/?hash=foo', body=None, headers=mock.ANY
+            ),
+            mock.call('GET', '/api/projects/', body=None, headers=mock.ANY),
+        ]
+    )
+
+
+@mock.patch.object(urllib.request, 'getproxies', return_value={})
+@mock.patch.object(http.client, 'HTTPSConnection')
+def test_rest_get__not_found(mock_conn, mock_proxies):
+    resp = mock_conn.return_value.getresponse.return_value
+    resp.status = 404
+    resp.getheader.return_value = None
+    resp.read.return_value = b'{"detail": "Not found."}'
+
+    client = api.REST('https://patchwork.kernel.org/api/')
+
+    assert client._get('https://patchwork.kernel.org/api/patches/1/') == (
+        {},
+        {},
+    )
+    resp.read.assert_called_once_with()
+
+
+def test_rest_check_list():
+    client = api.REST('https://patchwork.kernel.org/api/')
+
+    with mock.patch.object(client, '_detail') as mock_detail:
+        mock_detail.return_value = {'id': 1, 'name': 'A sample patch'}
+        with mock.patch.object(client, '_list') as mock_list:
+            mock_list.return_value = [
+                {
+                    'id': 1,
+                    'date': '2000-12-31 00:11:22',
+                    'user': {'id': 1, 'username': 'joe'},
+                    'state': 'success',
+                    'target_url': 'https://example.com/',
+                    'description': '',
+                    'context': 'hello-world',
+                },
+            ]
+
+            result = client.check_list(1, None)
+
+    mock_detail.assert_called_once_with('patches', 1)
+    mock_list.assert_called_once_with(
+        'patches', {}, resource_id=1, subresource_type='checks'
+    )
+    assert result[0]['patch'] == 'A sample patch'
+    assert result[0]['user'] == 'joe'
+
+
+def test_xmlrpc_state_id_by_name__cached():
+    client = api.XMLRPC('https://example.com/xmlrpc')
+
+    with mock.patch.object(client, 'state_list') as mock_state_list:
+        mock_state_list.return_value = [
+            {'id': 1, 'name': 'New'},
+            {'id': 2, 'name': 'Under Review'},
+            {'id': 3, 'name': 'Accepted'},
+        ]
+
+        assert client._state_id_by_name('accep') == 3
+        assert client._state_id_by_name('new') == 1
+        assert client._state_id_by_name('accep') == 3
+        assert client._state_id_by_name('foo') == 0
+
+    mock_state_list.assert_called_once_with('', 0)
+
+
+def test_xmlrpc_decode_patch():
+    patch = {
+        'id': 1,
+        'name': xmlrpc.xmlrpclib.Binary('Fix the ünicode'.encode('utf-8')),
+    }
+
+    result = api.XMLRPC._decode_patch(patch)
+
+    assert result == {'id': 1, 'name': 'Fix the ünicode'}
+
+
+def test_rest_generate_headers():
+    client = api.REST(
+        'https://patchwork.kernel.org/api/', username='user', password='pass'
+    )
+
+    headers = client._generate_headers({'Content-Type': 'application/json'})
+
+    assert headers['Authorization'] == 'Basic dXNlcjpwYXNz'
+    assert headers['Content-Type'] == 'application/json'
+    assert 'Content-Type' not in client._generate_headers()
+
+
+def test_json_roundtrip():
+    data = api._json_dumps({'state': 'accepted', 'archived': True})
+
+    assert isinstance(data, bytes)
+    assert api._json_loads(data) == {'state': 'accepted', 'archived': True}
+
+
+def test_rest_patch_to_dict():
+    patch = {
+        'id': 1157169,
+        'date': '2000-12-31T00:11:22',
+        'msgid': '<20190903170304.24325-1-stephen@that.guru>',
+        'name': '[1/3] Drop support for Python 3.4, add Python 3.7',
+        'project': {'id': 1, 'name': 'my-project'},
+        'state': 'new',
+        'archived': False,
+        'submitter': {
+            'id': 1,
+            'name': 'Joe Bloggs',
+            'email': 'joe.bloggs@example.com',
+        },
+        'delegate': None,
+        'commit_ref': None,
+        'hash': None,
+    }
+
+    result = api.REST._patch_to_dict(patch)
+
+    assert result['filename'] == ''
+    assert result['project'] == 'my-project'
+    assert result['project_id'] == 1
+    assert result['submitter'] == 'Joe Bloggs <joe.bloggs@example.com>'
+    assert result['delegate'] == ''
+    assert result['delegate_id'] == ''
+    assert result['hash'] == ''
+
+
+def test_rest_person_to_dict():
+    person = {'id': 1, 'name': '', 'email': 'joe@example.com', 'user': None}
+
+    result = api.REST._person_to_dict(person)
+
+    assert result == {
+        'id': 1,
+        'email': 'joe@example.com',
+        'name': 'joe@example.com',
+        'user': '',
+    }
+
+
+def test_rest_url():
+    client = api.REST('https://patchwork.kernel.org/api/')
+
+    assert (
+        client._url('patches', 1, 'checks', params={'user': 'joe'})
+        == 'https://patchwork.kernel.org/api/patches/1/checks/?user=joe'
+    )
+    assert (
+        client._url('projects') == 'https://patchwork.kernel.org/api/projects/'
+    )
+
+
+@mock.patch.object(api.REST, '_urlopen')
+def test_rest_get__conditional(mock_urlopen):
+    resp = mock_urlopen.return_value.__enter__.return_value
+    resp.status = 200
+    resp.read.return_value = b'{"id": 1}'
+    resp.headers = http.client.HTTPMessage()
+    resp.headers['ETag'] = '"abc"'
+
+    client = api.REST('https://patchwork.kernel.org/api/')
+    url = 'https://patchwork.kernel.org/api/patches/1/'
+
+    assert client._get(url)[0] == b'{"id": 1}'
+
+    resp.status = 304
+    resp.read.return_value = b''
+
+    assert client._get(url)[0] == b'{"id": 1}'
+
+    request = mock_urlopen.call_args[0][0]
+    assert request.get_header('If-none-match') == '"abc"'
+
+
+@mock.patch.object(api.REST, '_urlopen')
+def test_rest_get__conditional_bounded(mock_urlopen):
+    resp = mock_urlopen.return_value.__enter__.return_value
+    resp.status = 200
+    resp.read.return_value = b'[]'
+    resp.headers = http.client.HTTPMessage()
+    resp.headers['ETag'] = '"abc"'
+
+    client = api.REST('https://patchwork.kernel.org/api/')
+    url = 'https://patchwork.kernel.org/api/patches/?page=%d'
+
+    for page in range(api.RESPONSE_CACHE_SIZE + 1):
+        client._get(url % page)
+
+    # only the most recent responses are kept
+    assert len(client._responses) == api.RESPONSE_CACHE_SIZE
+    assert url % 0 not in client._responses
+    assert url % api.RESPONSE_CACHE_SIZE in client._responses
+
+
+def test_rest_patch_to_dict__mapping():
+    patch = {
+        'id': 1,
+        'date': '2000-12-31T00:11:22',
+        'msgid': '<foo@example.com>',
+        'name': 'A sample patch',
+        'project': {'id': 1, 'name': 'my-project'},
+        'state': 'new',
+        'archived': False,
+        'submitter': {'id': 1, 'name': '', 'email': 'joe@example.com'},
+        'delegate': {'id': 2, 'username': 'admin'},
+        'commit_ref': '698fa7f',
+        'hash': None,
+    }
+
+    result = dict(api.REST._patch_to_dict(patch))
+
+    assert sorted(result) == sorted(fakes.fake_patches()[0])
+    assert result['submitter'] == 'joe@example.com'
+    assert result['delegate'] == 'admin'
+    assert result['delegate_id'] == 2
+    assert api.REST._patch_to_dict(patch) != {}
+
+
+def test_rest_patch_get_by_project_hash__multiple_matches():
+    client = api.REST('https://patchwork.kernel.org/api/')
+
+    with mock.patch.object(client, '_list') as mock_list:
+        mock_list.return_value = [{'id': 1}, {'id': 2}]
+
+        assert client.patch_get_by_project_hash('foo', '698fa7f') == {}
+
+    mock_list.assert_called_once_with(
+        'patches',
+        {'project': 'foo', 'hash': '698fa7f', 'per_page': 2},
+        paginate=False,
+    )
+
+
+def test_rest_list__paginated():
+    client = api.REST('https://patchwork.kernel.org/api/')
+
+    first_page_headers = http.client.HTTPMessage()
+    first_page_headers['Link'] = (
+        '<https://patchwork.kernel.org/api/patches/?state=new&page=2>; '
+        'rel="next", '
+        '<https://patchwork.kernel.org/api/patches/?state=new&page=3>; '
+        'rel="last"'
+    )
+
+    def fake_get(url):
+        if url == 'https://patchwork.kernel.org/api/patches/?state=new':
+            return b'[{"id": 1}]', first_page_headers
+        if url.endswith('page=2'):
+            return b'[{"id": 2}]', {}
+        if url.endswith('page=3'):
+            return b'[{"id": 3}]', {}
+        raise AssertionError(f'unexpected URL {url}')
+
+    with mock.patch.object(client, '_get', side_effect=fake_get):
+        result = client._list('patches', {'state': 'new'})
+
+    assert result == [{'id': 1}, {'id': 2}, {'id': 3}]
+
+
+def test_rest_list__paginated_from_pool():
+    client = api.REST('https://patchwork.kernel.org/api/')
+    client._pool = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+    last = 'https://patchwork.kernel.org/api/patches/?page=2'
+    headers = http.client.HTTPMessage()
+    headers['Link'] = f'<{last}>; rel="last"'
+
+    def fake_get(url):
+        if url == last:
+            return b'[{"id": 2}]', {}
+        return b'[{"id": 1}]', headers
+
+    # fetching the pages mustn't need another worker from the same pool
+    with mock.patch.object(client, '_get', side_effect=fake_get):
+        future = client._pool.submit(client._list, 'patches')
+        result = future.result(timeout=5)
+
+    assert result == [{'id': 1}, {'id': 2}]
+
+
+def test_rest_list__no_paginate():
+    client = api.REST('https://patchwork.kernel.org/api/')
+
+    headers = http.client.HTTPMessage()
+    headers['Link'] = (
+        '<https://patchwork.kernel.org/api/patches/?per_page=2&page=2>; '
+        'rel="next"'
+    )
+
+    with mock.patch.object(client, '_get') as mock_get:
+        mock_get.return_value = (b'[{"id": 1}, {"id": 2}]', headers)
+
+        result = client._list('patches', {'per_page': 2}, paginate=False)
+
+    assert result == [{'id': 1}, {'id': 2}]
+    mock_get.assert_called_once_with(
+        'https://patchwork.kernel.org/api/patches/?per_page=2'
+    )
+
+
+def test_rest_list__paginated_next_only():
+    client = api.REST('https://patchwork.kernel.org/api/')
+
+    # Patchwork only links to the next and previous pages
+    def fake_get(url):
+        headers = http.client.HTTPMessage()
+        if url == 'https://patchwork.kernel.org/api/patches/?state=new':
+            headers['Link'] = (
+                '<https://patchwork.kernel.org/api/patches/?state=new&page=2>'
+                '; rel="next"'
+            )
+            return b'[{"id": 1}]', headers
+        if url.endswith('page=2'):
+            headers['Link'] = (
+                '<https://patchwork.kernel.org/api/patches/?state=new&page=3>'
+                '; rel="next", '
+                '<https://patchwork.kernel.org/api/patches/?state=new>'
+                '; rel="prev"'
+            )
+            return b'[{"id": 2}]', headers
+        if url.endswith('page=3'):
+            headers['Link'] = (
+                '<https://patchwork.kernel.org/api/patches/?state=new&page=2>'
+                '; rel="prev"'
+            )
+            return b'[{"id": 3}]', headers
+        raise AssertionError(f'unexpected URL {url}')
+
+    with mock.patch.object(client, '_get', side_effect=fake_get) as mock_get:
+        result = client._list('patches', {'state': 'new'})
+
+    assert result == [{'id': 1}, {'id': 2}, {'id': 3}]
+    assert mock_get.call_count == 3
+
+
+def test_rest_list__max_count_next_only():
+    client = api.REST('https://patchwork.kernel.org/api/')
+
+    def fake_get(url):
+        page = int(url.rpartition('page=')[2]) if 'page=' in url else 1
+        headers = http.client.HTTPMessage()
+        headers['Link'] = (
+            f'<https://patchwork.kernel.org/api/patches/?page={page + 1}>'
+            '; rel="next"'
+        )
+        return f'[{{"id": {page * 2 - 1}}}, {{"id": {page * 2}}}]', headers
+
+    with mock.patch.object(client, '_get', side_effect=fake_get) as mock_get:
+        result = client._list('patches', max_count=3)
+
+    # we stop following links once we have enough items
+    assert result == [{'id': 1}, {'id': 2}, {'id': 3}]
+    assert mock_get.call_count == 2
+
+
+def test_rest_list__max_count_from_pool():
+    client = api.REST('https://patchwork.kernel.org/api/')
+
+    headers = http.client.HTTPMessage()
+    headers[
+        'Link'
+    ] = '<https://patchwork.kernel.org/api/patches/?page=100>; rel="last"'
+
+    with mock.patch.object(client, '_get') as mock_get:
+        mock_get.return_value = (b'[{"id": 1}, {"id": 2}]', headers)
+
+        result = client._list('patches', max_count=3)
+
+    # we only fetch the pages we need
+    assert len(result) == 3
+    assert mock_get.call_count == 2
+
+
+def test_rest_patch_list__max_count_last():
+    client = api.REST('https://patchwork.kernel.org/api/')
+
+    with mock.patch.object(client, '_list') as mock_list:
+        mock_list.return_value = [
+            dict(fakes.fake_patches()[0], id=3),
+            dict(fakes.fake_patches()[0], id=2),
+        ]
+
+        result = client.patch_list(
+            None, None, None, None, None, None, None, None, max_count=-2
+        )
+
+    mock_list.assert_called_once_with(
+        'patches', params={'order': '-id'}, max_count=2
+    )
+    assert [patch['id'] for patch in result] == [2, 3]
+
+
+@mock.patch.object(http.client, 'HTTPSConnection')
+def test_rest_urlopen__retry_get(mock_conn):
+    stale, fresh = mock.Mock(), mock.Mock()
+    stale.getresponse.side_effect = http.client.RemoteDisconnected()
+    fresh.getresponse.return_value.status = 200
+    fresh.getresponse.return_value.getheader.return_value = None
+    mock_conn.side_effect = [stale, fresh]
+
+    client = api.REST('https://patchwork.kernel.org/api/')
+    request = urllib.request.Request(
+        'https://patchwork.kernel.org/api/patches/1/', method='GET'
+    )
+
+    with mock.patch.object(urllib.request, 'getproxies', dict):
+        resp = client._urlopen(request)
+
+    assert resp is fresh.getresponse.return_value
+    stale.close.assert_called_once_with()
+
+
+@mock.patch.object(http.client, 'HTTPSConnection')
+def test_rest_urlopen__no_retry_post(mock_conn):
+    stale = mock.Mock()
+    stale.getresponse.side_effect = http.client.RemoteDisconnected()
+    mock_conn.return_value = stale
+
+    client = api.REST('https://patchwork.kernel.org/api/')
+    request = urllib.request.Request(
+        'https://patchwork.kernel.org/api/patches/1/checks/',
+        data=b'{}',
+        method='POST',
+    )
+
+    # the server may have created the check, so we mustn't send it again
+    with mock.patch.object(urllib.request, 'getproxies', dict):
+        with pytest.raises(http.client.RemoteDisconnected):
+            client._urlopen(request)
+
+    stale.request.assert_called_once()
+    mock_conn.assert_called_once()
+
+
+@mock.patch.object(http.client, 'HTTPSConnection')
+def test_rest_urlopen__redirect_loop(mock_conn):
+    conn = mock_conn.return_value
+    conn.getresponse.return_value.status = 302
+    conn.getresponse.return_value.read.return_value = b''
+    conn.getresponse.return_value.getheader.return_value = '/api/patches/1/'
+
+    client = api.REST('https://patchwork.kernel.org/api/')
+    request = urllib.request.Request(
+        'https://patchwork.kernel.org/api/patches/1/', method='GET'
+    )
+
+    with mock.patch.object(urllib.request, 'getproxies', dict):
+        with pytest.raises(urllib.error.HTTPError) as exc:
+            client._urlopen(request)
+
+    assert exc.value.code == 302
+    assert conn.request.call_count == 11
+
+
+@mock.patch.object(http.client, 'HTTPSConnection')
+def test_rest_urlopen__no_redirect_patch(mock_conn):
+    conn = mock_conn.return_value
+    conn.getresponse.return_value.status = 301
+    conn.getresponse.return_value.read.return_value = b''
+    conn.getresponse.return_value.getheader.return_value = '/api/patches/1/'
+
+    client = api.REST('https://patchwork.kernel.org/api/')
+    request = urllib.request.Request(
+        'https://patchwork.kernel.org/api/patches/1',
+        data=b'{}',
+        method='PATCH',
+    )
+
+    # we mustn't mistake the redirect for a successful update
+    with mock.patch.object(urllib.request, 'getproxies', dict):
+        with pytest.raises(urllib.error.HTTPError) as exc:
+            client._urlopen(request)
+
+    assert exc.value.code == 301
+    conn.request.assert_called_once()
+
+
+@mock.patch.object(api.REST, '_urlopen')
+def test_rest_patch_set(mock_urlopen):
+    resp = mock_urlopen.return_value.__enter__.return_value
+    resp.status = 200
+    resp.read.return_value = b'{"id": 1}'
+
+    client = api.REST('https://patchwork.kernel.org/api/', token='foo')
+    client.patch_set(1, state='Under Review')
+
+    request = mock_urlopen.call_args[0][0]
+    assert request.get_method() == 'PATCH'
+    assert request.full_url == 'https://patchwork.kernel.org/api/patches/1/'
+    assert request.get_header('Content-type') == 'application/json'
+    assert request.get_header('Authorization') == 'Token foo'
+    assert api._json_loads(request.data) == {'state': 'under-review'}
+
+
+@mock.patch.object(xmlrpc.xmlrpclib, 'MultiCall')
+def test_xmlrpc_patch_list__submitter(mock_multicall):
+    results = xmlrpc.xmlrpclib.MultiCallIterator(
+        [[[fakes.fake_patches()[0]]], [[fakes.fake_patches()[1]]]]
+    )
+    mock_multicall.return_value.return_value = results
+
+    client = api.XMLRPC('https://example.com/xmlrpc')
+    with mock.patch.object(client, '_client') as mock_client:
+        mock_client.person_list.return_value = fakes.fake_people()[:2]
+
+        result = client.patch_list(
+            None, 'Jeremy', None, None, None, None, None, None
+        )
+
+    mock_multicall.return_value.patch_list.assert_has_calls(
+        [
+            mock.call({'submitter_id': 1}),
+            mock.call({'submitter_id': 4}),
+        ]
+    )
+    mock_client.patch_list.assert_not_called()
+    assert result == fakes.fake_patches()[:2]
+
+
+@mock.patch.object(xmlrpc.xmlrpclib, 'MultiCall')
+def test_xmlrpc_patch_list__prefetch_ids(mock_multicall):
+    results = xmlrpc.xmlrpclib.MultiCallIterator(
+        [
+            [fakes.fake_states()],
+            [fakes.fake_projects()],
+            [fakes.fake_people()[:1]],
+        ]
+    )
+    mock_multicall.return_value.return_value = results
+
+    client = api.XMLRPC('https://example.com/xmlrpc')
+    with mock.patch.object(client, '_client') as mock_client:
+        mock_client.patch_list.return_value = fakes.fake_patches()[:1]
+
+        result = client.patch_list(
+            'patchwork', 'Jeremy', None, 'new', None, None, None, None
+        )
+
+    mock_multicall.return_value.state_list.assert_called_once_with('', 0)
+    mock_multicall.return_value.project_list.assert_called_once_with(
+        'patchwork', 0
+    )
+    mock_multicall.return_value.person_list.assert_called_once_with(
+        'Jeremy', 0
+    )
+    mock_client.state_list.assert_not_called()
+    mock_client.project_list.assert_not_called()
+    mock_client.person_list.assert_not_called()
+    mock_client.patch_list.assert_called_once_with(
+        {'state_id': 1, 'project_id': 1, 'submitter_id': 1}
+    )
+    assert result == fakes.fake_patches()[:1]
+
+
+@mock.patch.object(xmlrpc.xmlrpclib, 'MultiCall')
+def test_xmlrpc_patch_list__delegate_no_multicall(mock_multicall):
+    mock_multicall.return_value.side_effect = xmlrpc.xmlrpclib.Fault(
+        1, 'method "system.multicall" is not supported'
+    )
+
+    client = api.XMLRPC('https://example.com/xmlrpc')
+    with mock.patch.object(client, '_client') as mock_client:
+        mock_client.person_list.return_value = fakes.fake_people()[:2]
+        mock_client.patch_list.side_effect = [
+            [fakes.fake_patches()[0]],
+            [fakes.fake_patches()[1]],
+        ]
+
+        result = client.patch_list(
+            None, None, 'Jeremy', None, None, None, None, None
+        )
+
+    mock_client.patch_list.assert_has_calls(
+        [
+            mock.call({'delegate_id': 1}),
+            mock.call({'delegate_id': 4}),
+        ]
+    )
+    assert result == fakes.fake_patches()[:2]
+
+
+def _fake_xmlrpc_server(**methods):
+    """Emulate a Patchwork server, which doesn't support multicall."""
+
+    def request(host, handler, request_body, verbose=False):
+        params, method = xmlrpc.xmlrpclib.loads(request_body)
+        if method not in methods:
+            raise xmlrpc.xmlrpclib.Fault(
+                1, f'method "{method}" is not supported'
+            )
+        return (methods[method](*params),)
+
+    return request
+
+
+def _called_methods(mock_request):
+    return [
+        xmlrpc.xmlrpclib.loads(call.args[2])[1]
+        for call in mock_request.call_args_list
+    ]
+
+
+@mock.patch.object(xmlrpc.Transport, 'request')
+def test_xmlrpc_patch_list__round_trips(mock_request):
+    mock_request.side_effect = _fake_xmlrpc_server(
+        state_list=lambda search_str, max_count: fakes.fake_states(),
+        project_list=lambda search_str, max_count: fakes.fake_projects(),
+        person_list=lambda search_str, max_count: fakes.fake_people()[:2],
+        patch_list=lambda filters: [],
+    )
+
+    client = api.XMLRPC('https://example.com/xmlrpc')
+    client.patch_list(
+        'patchwork', 'Jeremy', None, 'new', None, None, None, None
+    )
+
+    # we only try multicall once
+    assert _called_methods(mock_request) == [
+        'system.multicall',
+        'state_list',
+        'project_list',
+        'person_list',
+        'patch_list',
+        'patch_list',
+    ]
+
+
+def test_xmlrpc_patch_list__ids():
+    client = api.XMLRPC('https://example.com/xmlrpc')
+
+    with mock.patch.object(client, '_client') as mock_client:
+        mock_client.patch_list.return_value = []
+
+        client.patch_list('2', '4', None, '3', None, None, None, None)
+
+    mock_client.state_list.assert_not_called()
+    mock_client.project_list.assert_not_called()
+    mock_client.person_list.assert_not_called()
+    mock_client.patch_list.assert_called_once_with(
+        {'state_id': 3, 'project_id': 2, 'submitter_id': 4}
+    )
+
+
+def test_xmlrpc_project_id_by_name__not_decimal():
+    client = api.XMLRPC('https://example.com/xmlrpc')
+
+    with mock.patch.object(client, '_client') as mock_client:
+        mock_client.project_list.return_value = []
+
+        # '²' is a digit but not a decimal, so int() would choke on it
+        assert client._project_id_by_name('²') == 0
+
+    mock_client.project_list.assert_called_once_with('²', 0)
+
+
+@mock.patch.object(xmlrpc.xmlrpclib, 'MultiCall')
+def test_xmlrpc_patch_get_by_project_hash_many(mock_multicall):
+    results = xmlrpc.xmlrpclib.MultiCallIterator([[{'id': 1}], [{}]])
+    mock_multicall.return_value.return_value = results
+
+    client = api.XMLRPC('https://example.com/xmlrpc')
+    result = client.patch_get_by_project_hash_many(
+        'patchwork', ['698fa7f', '2a4c2b7']
+    )
+
+    mock_multicall.return_value.patch_get_by_project_hash.assert_has_calls(
+        [
+            mock.call('patchwork', '698fa7f'),
+            mock.call('patchwork', '2a4c2b7'),
+        ]
+    )
+    assert result == [{'id': 1}, {}]
+
+
+@mock.patch.object(xmlrpc.xmlrpclib, 'MultiCall')
+def test_xmlrpc_patch_get_many(mock_multicall):
+    results = xmlrpc.xmlrpclib.MultiCallIterator(
+        [
+            [{'id': 1}],
+            {'faultCode': 1, 'faultString': 'nope'},
+            [{}],
+        ]
+    )
+    mock_multicall.return_value.return_value = results
+
+    client = api.XMLRPC('https://example.com/xmlrpc')
+    result = client.patch_get_many([1, 2, 3])
+
+    mock_multicall.return_value.patch_get.assert_has_calls(
+        [mock.call(1), mock.call(2), mock.call(3)]
+    )
+    assert result[0] == {'id': 1}
+    assert isinstance(result[1], xmlrpc.xmlrpclib.Fault)
+    assert isinstance(result[2], exceptions.APIError)
+
+
+@mock.patch.object(xmlrpc.Transport, 'request')
+def test_xmlrpc_patch_set_many__single(mock_request):
+    mock_request.side_effect = _fake_xmlrpc_server(
+        patch_set=lambda patch_id, params: True,
+    )
+
+    client = api.XMLRPC('https://example.com/xmlrpc')
+
+    assert client.patch_set_many([{'patch_id': 1, 'archived': 'yes'}]) == [
+        None
+    ]
+
+    # a single update never tries multicall
+    assert _called_methods(mock_request) == ['patch_set']
+
+
+@mock.patch.object(xmlrpc.Transport, 'request')
+def test_xmlrpc_check_create_many__single(mock_request):
+    mock_request.side_effect = _fake_xmlrpc_server(
+        check_create=lambda *args: True,
+    )
+
+    client = api.XMLRPC('https://example.com/xmlrpc')
+
+    assert client.check_create_many(
+        [{'patch_id': 1, 'context': 'foo', 'state': 'success'}]
+    ) == [None]
+
+    # a single check never tries multicall
+    assert _called_methods(mock_request) == ['check_create']
+
+
+@mock.patch.object(xmlrpc.Transport, 'request')
+def test_xmlrpc_patch_get_many__round_trips(mock_request):
+    mock_request.side_effect = _fake_xmlrpc_server(
+        patch_get=lambda patch_id: {'id': patch_id},
+    )
+
+    client = api.XMLRPC('https://example.com/xmlrpc')
+
+    assert client.patch_get_many([1, 2]) == [{'id': 1}, {'id': 2}]
+    assert client.patch_get_many([3, 4]) == [{'id': 3}, {'id': 4}]
+
+    # we only try multicall once
+    assert _called_methods(mock_request) == [
+        'system.multicall',
+        'patch_get',
+        'patch_get',
+        'patch_get',
+        'patch_get',
+    ]
+
+
+@mock.patch.object(xmlrpc.xmlrpclib, 'MultiCall')
+def test_xmlrpc_patch_get_mbox_many(mock_multicall):
+    results = xmlrpc.xmlrpclib.MultiCallIterator(
+        [
+            [{'filename': 'foo'}],
+            ['From foo'],
+            {'faultCode': 1, 'faultString': 'nope'},
+            [''],
+            [{}],
+            [''],
+        ]
+    )
+    mock_multicall.return_value.return_value = results
+
+    client = api.XMLRPC('https://example.com/xmlrpc')
+    result = client.patch_get_mbox_many([1, 2, 3])
+
+    mock_multicall.return_value.patch_get_mbox.assert_has_calls(
+        [mock.call(1), mock.call(2), mock.call(3)]
+    )
+    assert result == [('From foo', 'foo'), None, None]
+
+
+def test_xmlrpc_patch_get_mbox():
+    client = api.XMLRPC('https://example.com/xmlrpc')
+    with mock.patch.object(client, '_client') as mock_client:
+        mock_client.patch_get.return_value = {'filename': 'foo'}
+        mock_client.patch_get_mbox.return_value = 'From foo'
+
+        result = client.patch_get_mbox(1)
+
+    mock_client.patch_get.assert_called_once_with(1)
+    mock_client.patch_get_mbox.assert_called_once_with(1)
+    assert result == ('From foo', 'foo')
+
+
+@mock.patch.object(xmlrpc.Transport, 'request')
+def test_xmlrpc_patch_get_mbox__round_trips(mock_request):
+    mock_request.side_effect = _fake_xmlrpc_server(
+        patch_get=lambda patch_id: {'id': patch_id, 'filename': 'foo'},
+        patch_get_mbox=lambda patch_id: 'From foo',
+    )
+
+    client = api.XMLRPC('https://example.com/xmlrpc')
+
+    assert client.patch_get_mbox(1) == ('From foo', 'foo')
+
+    # a single mbox never tries multicall
+    assert _called_methods(mock_request) == ['patch_get', 'patch_get_mbox']
+
+
+def test_xmlrpc_patch_get_mbox__cached_patch():
+    client = api.XMLRPC('https://example.com/xmlrpc')
+    with mock.patch.object(client, '_client') as mock_client:
+        mock_client.patch_get.return_value = {'filename': 'foo'}
+        mock_client.patch_get_mbox.return_value = 'From foo'
+
+        assert client.patch_get(1) == {'filename': 'foo'}
+        assert client.patch_get_mbox(1) == ('From foo', 'foo')
+
+    mock_client.patch_get.assert_called_once_with(1)
+    mock_client.patch_get_mbox.assert_called_once_with(1)
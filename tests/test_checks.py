@@ -1,5 +1,7 @@
 from unittest import mock
 
+import pytest
+
 from pwclient import checks
 from pwclient import exceptions
 
@@ -31,6 +33,30 @@ Check information for patch id 1
     )
 
 
+def test_action_check_get__format(capsys):
+    rpc = mock.Mock()
+    rpc.check_list.return_value = fakes.fake_checks()
+
+    checks.action_get(rpc, 1, '{%{context}}: %{state} (%{id})')
+
+    captured = capsys.readouterr()
+
+    assert captured.out == '{hello-world}: success (1)\n'
+
+
+def test_action_check_get__format_unknown_field(capsys):
+    rpc = mock.Mock()
+    rpc.check_list.return_value = fakes.fake_checks()
+
+    with pytest.raises(SystemExit):
+        checks.action_get(rpc, 1, '%{context}: %{foo}')
+
+    captured = capsys.readouterr()
+
+    assert captured.out == ''
+    assert captured.err == 'Unknown format field(s): foo\n'
+
+
 def test_action_check_list(capsys):
     rpc = mock.Mock()
     rpc.check_list.return_value = fakes.fake_checks()
@@ -76,36 +102,33 @@ Information for check id 1
     )
 
 
-def test_action_check_create():
+def test_action_check_create_many(capsys):
     rpc = mock.Mock()
+    rpc.check_create_many.return_value = [None, exceptions.APIError('oops')]
 
-    args = (
-        1,
-        'hello-world',
-        'success',
-        'https://example.com',
-        'This is a sample check',
+    checks.action_create_many(
+        rpc, [1, 2], 'hello-world', 'success', 'https://example.com', ''
     )
 
-    checks.action_create(rpc, *args)
-
-    rpc.check_create.assert_called_once_with(*args)
-
-
-def test_action_check_create__error(capsys):
-    rpc = mock.Mock()
-    rpc.check_create.side_effect = exceptions.APIError('whoops')
-
-    args = (
-        1,
-        'hello-world',
-        'success',
-        'https://example.com',
-        'This is a sample check',
+    rpc.check_create_many.assert_called_once_with(
+        [
+            {
+                'patch_id': 1,
+                'context': 'hello-world',
+                'state': 'success',
+                'target_url': 'https://example.com',
+                'description': '',
+            },
+            {
+                'patch_id': 2,
+                'context': 'hello-world',
+                'state': 'success',
+                'target_url': 'https://example.com',
+                'description': '',
+            },
+        ]
     )
 
-    checks.action_create(rpc, *args)
-
     captured = capsys.readouterr()
 
-    assert captured.err == 'whoops'
+    assert captured.err == 'oops\n'
@@ -0,0 +1,53 @@
+import pytest
+
+from pwclient import parser
+
+
+def _subcommands(action_parser):
+    return list(action_parser._subparsers._group_actions[0].choices)
+
+
+def test_get_parser():
+    action_parser = parser.get_parser()
+
+    assert _subcommands(action_parser) == list(parser.SUBCOMMANDS)
+
+
+def test_get_parser__subcmd():
+    action_parser = parser.get_parser('git-am')
+
+    assert _subcommands(action_parser) == list(parser.SUBCOMMANDS)
+    assert action_parser.format_usage() == parser.get_parser().format_usage()
+
+    args = action_parser.parse_args(['git-am', '-3', '1'])
+
+    assert args.subcmd == 'git_am'
+    assert args.three_way
+    assert args.id == ['1']
+
+
+def test_get_parser__subcmd_error(capsys):
+    action_parser = parser.get_parser('view')
+
+    with pytest.raises(SystemExit):
+        action_parser.parse_args(['view', '1', '--bogus'])
+
+    captured = capsys.readouterr()
+
+    assert captured.err.startswith(parser.get_parser().format_usage())
+
+
+def test_get_parser__unknown_subcmd():
+    action_parser = parser.get_parser('--help')
+
+    assert _subcommands(action_parser) == list(parser.SUBCOMMANDS)
+
+
+def test_get_parser__shared_parents():
+    parser._get_hash_parser.cache_clear()
+    parser._get_filter_parser.cache_clear()
+
+    parser.get_parser('view')
+
+    assert parser._get_hash_parser.cache_info().currsize == 1
+    assert parser._get_filter_parser.cache_info().currsize == 0
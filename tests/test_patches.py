@@ -1,3 +1,4 @@
+import subprocess
 from unittest import mock
 
 import pytest
@@ -11,41 +12,55 @@ FAKE_PROJECT = 'defaultproject'
 FAKE_PROJECT_ID = 42
 
 
-def test_patch_id_from_hash__no_matches(capsys):
+def test_patch_ids_from_hashes():
     api = mock.Mock()
-    api.patch_get_by_project_hash.return_value = {}
+    api.patch_get_by_project_hash_many.return_value = [{'id': '1'}, {'id': 2}]
 
-    with pytest.raises(SystemExit):
-        patches.patch_id_from_hash(api, 'foo', '698fa7f')
+    result = patches.patch_ids_from_hashes(api, 'foo', ['698fa7f', '2a4c2b7'])
 
-    captured = capsys.readouterr()
+    assert result == [1, 2]
+    api.patch_get_by_project_hash_many.assert_called_once_with(
+        'foo', ['698fa7f', '2a4c2b7']
+    )
 
-    assert 'No patch has the hash provided' in captured.err
-    assert captured.out == ''
+
+def test_patch_ids_from_hashes__duplicates():
+    api = mock.Mock()
+    api.patch_get_by_project_hash_many.return_value = [{'id': 1}, {'id': 2}]
+
+    result = patches.patch_ids_from_hashes(
+        api, 'foo', ['698fa7f', '2a4c2b7', '698fa7f']
+    )
+
+    assert result == [1, 2, 1]
+    api.patch_get_by_project_hash_many.assert_called_once_with(
+        'foo', ['698fa7f', '2a4c2b7']
+    )
 
 
-def test_patch_id_from_hash__invalid_id(capsys):
+def test_patch_ids_from_hashes__no_matches(capsys):
     api = mock.Mock()
-    api.patch_get_by_project_hash.return_value = {'id': 'xyz'}
+    api.patch_get_by_project_hash_many.return_value = [{'id': 1}, {}]
 
     with pytest.raises(SystemExit):
-        patches.patch_id_from_hash(api, 'foo', '698fa7f')
+        patches.patch_ids_from_hashes(api, 'foo', ['698fa7f', '2a4c2b7'])
 
     captured = capsys.readouterr()
 
-    assert 'Invalid patch ID obtained from server' in captured.err
-    assert captured.out == ''
+    assert 'No patch has the hash provided' in captured.err
 
 
-def test_patch_id_from_hash():
+def test_patch_ids_from_hashes__invalid_id(capsys):
     api = mock.Mock()
-    api.patch_get_by_project_hash.return_value = {'id': '1'}
+    api.patch_get_by_project_hash_many.return_value = [{'id': 'xyz'}]
 
-    result = patches.patch_id_from_hash(api, 'foo', '698fa7f')
+    with pytest.raises(SystemExit):
+        patches.patch_ids_from_hashes(api, 'foo', ['698fa7f'])
 
-    assert result == 1
-    api.patch_get_by_project_hash.assert_called_once_with('foo', '698fa7f')
-    api.patch_get_by_hash.assert_not_called()
+    captured = capsys.readouterr()
+
+    assert 'Invalid patch ID obtained from server' in captured.err
+    assert captured.out == ''
 
 
 def test_list_patches(capsys):
@@ -101,6 +116,29 @@ def test_list_patches__format_option_with_msgid(capsys):
     )
 
 
+def test_list_patches__format_option_with_braces(capsys):
+    fake_patches = fakes.fake_patches()[:1]
+
+    patches._list_patches(fake_patches, '{%{id}} %{_msgid_} {}')
+
+    captured = capsys.readouterr()
+
+    assert (
+        captured.out
+        == '{1157169} 20190903170304.24325-1-stephen@that.guru {}\n'
+    )
+
+
+def test_list_patches__format_option_without_fields(capsys):
+    fake_patches = fakes.fake_patches()
+
+    patches._list_patches(fake_patches, 'patch')
+
+    captured = capsys.readouterr()
+
+    assert captured.out == 'patch\npatch\npatch\n'
+
+
 @mock.patch.object(patches, '_list_patches')
 def test_action_list__no_submitter_no_delegate(mock_list_patches, capsys):
     api = mock.Mock()
@@ -124,8 +162,7 @@ def test_action_list__no_submitter_no_delegate(mock_list_patches, capsys):
     )
 
 
-@mock.patch.object(patches, '_list_patches')
-def test_action_list__submitter_filter(mock_list_patches, capsys):
+def test_action_list__submitter_filter(capsys):
     api = mock.Mock()
     api.patch_list.return_value = fakes.fake_patches()
 
@@ -134,9 +171,16 @@ def test_action_list__submitter_filter(mock_list_patches, capsys):
     captured = capsys.readouterr()
 
     assert (
-        'Patches submitted by Joe Bloggs <joe.bloggs@example.com>:'
-        in captured.out
-    )  # noqa: E501
+        captured.out
+        == """\
+Patches submitted by Joe Bloggs <joe.bloggs@example.com>:
+ID      State        Name
+--      -----        ----
+1157169 New          [1/3] Drop support for Python 3.4, add Python 3.7
+1157170 Accepted     [2/3] docker: Simplify MySQL reset
+1157168 Rejected     [3/3] docker: Use pyenv for Python versions
+"""
+    )
 
     api.patch_list.assert_called_once_with(
         project='defaultproject',
@@ -149,14 +193,9 @@ def test_action_list__submitter_filter(mock_list_patches, capsys):
         hash=None,
         max_count=None,
     )
-    mock_list_patches.assert_called_once_with(
-        api.patch_list.return_value,
-        None,
-    )
 
 
-@mock.patch.object(patches, '_list_patches')
-def test_action_list__delegate_filter(mock_list_patches, capsys):
+def test_action_list__delegate_filter(capsys):
     api = mock.Mock()
     api.patch_list.return_value = fakes.fake_patches()
 
@@ -164,7 +203,17 @@ def test_action_list__delegate_filter(mock_list_patches, capsys):
 
     captured = capsys.readouterr()
 
-    assert 'Patches delegated to admin:' in captured.out
+    assert (
+        captured.out
+        == """\
+Patches delegated to admin:
+ID      State        Name
+--      -----        ----
+1157169 New          [1/3] Drop support for Python 3.4, add Python 3.7
+1157170 Accepted     [2/3] docker: Simplify MySQL reset
+1157168 Rejected     [3/3] docker: Use pyenv for Python versions
+"""
+    )
 
     api.patch_list.assert_called_once_with(
         project='defaultproject',
@@ -177,17 +226,13 @@ def test_action_list__delegate_filter(mock_list_patches, capsys):
         hash=None,
         max_count=None,
     )
-    mock_list_patches.assert_called_once_with(
-        api.patch_list.return_value,
-        None,
-    )
 
 
-def test_action_info(capsys):
+def test_action_info_many(capsys):
     api = mock.Mock()
-    api.patch_get.return_value = fakes.fake_patches()[0]
+    api.patch_get_many.return_value = fakes.fake_patches()[:1]
 
-    patches.action_info(api, 1157169)
+    patches.action_info_many(api, [1157169])
 
     captured = capsys.readouterr()
 
@@ -216,30 +261,42 @@ Information for patch id 1157169
     )
 
 
-def test_action_info__invalid_id(capsys):
+def test_action_info_many__invalid_id(capsys):
     api = mock.Mock()
-    api.patch_get.side_effect = exceptions.APIError('foo')
+    api.patch_get_many.return_value = [
+        {'id': 1, 'name': 'foo'},
+        exceptions.APIError('bar'),
+        {'id': 3, 'name': 'baz'},
+    ]
 
     with pytest.raises(SystemExit):
-        patches.action_info(api, 1)
+        patches.action_info_many(api, [1, 2, 3])
 
     captured = capsys.readouterr()
 
-    assert captured.out == ''
-    assert captured.err == 'foo\n'
+    api.patch_get_many.assert_called_once_with([1, 2, 3])
+    assert (
+        captured.out
+        == """\
+Information for patch id 1
+--------------------------
+- id            : 1
+- name          : foo
+"""
+    )
+    assert captured.err == 'bar\n'
 
 
-@mock.patch.object(patches.io, 'open')
+@mock.patch('builtins.open')
 @mock.patch.object(patches.os.path, 'basename')
-@mock.patch.object(patches.os.path, 'exists')
-def test_action_get(mock_exists, mock_basename, mock_open, capsys):
+def test_action_get(mock_basename, mock_open, capsys):
     api = mock.Mock()
-    api.patch_get_mbox.return_value = (
-        'foo',
-        '1-3--Drop-support-for-Python-3-4--add-Python-3-7',
+    api.patch_get_mbox.side_effect = _fake_patch_get_mbox(
+        [('foo', '1-3--Drop-support-for-Python-3-4--add-Python-3-7')]
     )
-    mock_exists.side_effect = [True, False]
-    mock_basename.return_value = api.patch_get_mbox.return_value[1]
+    mock_basename.side_effect = lambda x: x
+    mock_file = mock.MagicMock()
+    mock_open.side_effect = [FileExistsError, mock_file]
 
     patches.action_get(api, 1157169)
 
@@ -248,21 +305,20 @@ def test_action_get(mock_exists, mock_basename, mock_open, capsys):
     mock_basename.assert_called_once_with(
         '1-3--Drop-support-for-Python-3-4--add-Python-3-7'
     )
-    mock_exists.assert_has_calls(
+    mock_open.assert_has_calls(
         [
             mock.call(
-                '1-3--Drop-support-for-Python-3-4--add-Python-3-7.patch'
+                '1-3--Drop-support-for-Python-3-4--add-Python-3-7.patch',
+                'xb',
             ),
             mock.call(
-                '1-3--Drop-support-for-Python-3-4--add-Python-3-7.0.patch'
+                '1-3--Drop-support-for-Python-3-4--add-Python-3-7.0.patch',
+                'xb',
             ),
         ]
     )
-    mock_open.assert_called_once_with(
-        '1-3--Drop-support-for-Python-3-4--add-Python-3-7.0.patch',
-        'x',
-        encoding='utf-8',
-    )
+    assert mock_open.call_count == 2
+    mock_file.write.assert_called_once_with(b'foo')
 
     assert (
         captured.out
@@ -285,20 +341,40 @@ def test_action_get__invalid_id(capsys):
     assert captured.err == 'foo\n'
 
 
+def _fake_patch_get_mbox(mboxes):
+    """Generate a fake patch_get_mbox that writes the given mboxes."""
+    mboxes = iter(mboxes)
+
+    def patch_get_mbox(patch_id, out_fp=None):
+        mbox = next(mboxes)
+        if isinstance(mbox, Exception):
+            raise mbox
+
+        mbox, filename = mbox
+        out_fp.write(mbox.encode('utf-8'))
+        return None, filename
+
+    return patch_get_mbox
+
+
 @mock.patch.object(patches.os.environ, 'get')
-@mock.patch.object(patches.subprocess, 'Popen')
+@mock.patch('subprocess.Popen')
 def test_action_view__no_pager(mock_popen, mock_env, capsys):
     api = mock.Mock()
-    api.patch_get_mbox.return_value = (
-        'foo',
-        '1-3--Drop-support-for-Python-3-4--add-Python-3-7',
+    api.patch_get_mbox.side_effect = _fake_patch_get_mbox(
+        [
+            (
+                'foo',
+                '1-3--Drop-support-for-Python-3-4--add-Python-3-7',
+            ),
+        ]
     )
     mock_env.return_value = None
 
     patches.action_view(api, [1])
 
     mock_popen.assert_not_called()
-    api.patch_get_mbox.assert_called_once_with(1)
+    api.patch_get_mbox.assert_called_once_with(1, out_fp=mock.ANY)
 
     captured = capsys.readouterr()
 
@@ -306,23 +382,25 @@ def test_action_view__no_pager(mock_popen, mock_env, capsys):
 
 
 @mock.patch.object(patches.os.environ, 'get')
-@mock.patch.object(patches.subprocess, 'Popen')
+@mock.patch('subprocess.Popen')
 def test_action_view__no_pager_multiple_patches(mock_popen, mock_env, capsys):
     api = mock.Mock()
-    api.patch_get_mbox.side_effect = [
-        (
-            'foo',
-            '1-3--Drop-support-for-Python-3-4--add-Python-3-7',
-        ),
-        (
-            'bar',
-            '2-3-docker-Simplify-MySQL-reset',
-        ),
-        (
-            'baz',
-            '3-3-docker-Use-pyenv-for-Python-versions',
-        ),
-    ]
+    api.patch_get_mbox.side_effect = _fake_patch_get_mbox(
+        [
+            (
+                'foo',
+                '1-3--Drop-support-for-Python-3-4--add-Python-3-7',
+            ),
+            (
+                'bar',
+                '2-3-docker-Simplify-MySQL-reset',
+            ),
+            (
+                'baz',
+                '3-3-docker-Use-pyenv-for-Python-versions',
+            ),
+        ]
+    )
     mock_env.return_value = None
 
     patches.action_view(api, [1, 2, 3])
@@ -334,41 +412,67 @@ def test_action_view__no_pager_multiple_patches(mock_popen, mock_env, capsys):
 
 
 @mock.patch.object(patches.os.environ, 'get')
-@mock.patch.object(patches.subprocess, 'Popen')
-def test_view__with_pager(mock_popen, mock_env, capsys):
+@mock.patch('subprocess.Popen')
+def test_action_view__no_pager_duplicate_patches(mock_popen, mock_env, capsys):
     api = mock.Mock()
-    api.patch_get_mbox.return_value = (
-        'foo',
-        '1-3--Drop-support-for-Python-3-4--add-Python-3-7',
+    api.patch_get_mbox.side_effect = _fake_patch_get_mbox(
+        [
+            (
+                'foo',
+                '1-3--Drop-support-for-Python-3-4--add-Python-3-7',
+            ),
+        ]
     )
+    mock_env.return_value = None
+
+    patches.action_view(api, [1, 1])
+
+    captured = capsys.readouterr()
+
+    mock_popen.assert_not_called()
+    api.patch_get_mbox.assert_called_once_with(1, out_fp=mock.ANY)
+    assert captured.out == 'foo\n'
+
+
+@mock.patch.object(patches.os.environ, 'get')
+@mock.patch('subprocess.Popen')
+def test_view__with_pager(mock_popen, mock_env, capsys):
+    api = mock.Mock()
+    api.patch_get_mbox_many.return_value = [
+        (
+            'foo',
+            '1-3--Drop-support-for-Python-3-4--add-Python-3-7',
+        ),
+    ]
     mock_env.return_value = 'less'
 
     patches.action_view(api, [1])
 
+    api.patch_get_mbox_many.assert_called_once_with([1])
+
     mock_popen.assert_called_once_with(['less'], stdin=mock.ANY)
-    mock_popen.return_value.communicate.assert_has_calls(
+    mock_popen.return_value.stdin.write.assert_has_calls(
         [
-            mock.call(input=b'foo'),
+            mock.call(b'foo'),
         ]
     )
+    mock_popen.return_value.stdin.close.assert_called_once_with()
+    mock_popen.return_value.wait.assert_called_once_with()
 
     captured = capsys.readouterr()
     assert captured.out == ''
 
 
 @mock.patch.object(patches.os.environ, 'get')
-@mock.patch.object(patches.subprocess, 'Popen')
+@mock.patch('subprocess.Popen')
 def test_view__with_pager_multiple_ids(mock_popen, mock_env, capsys):
     api = mock.Mock()
-    api.patch_get_mbox.side_effect = [
+    api.patch_get_mbox_many.return_value = [
         (
             'foo',
             '1-3--Drop-support-for-Python-3-4--add-Python-3-7',
         ),
-        (
-            'bar',
-            '2-3-docker-Simplify-MySQL-reset',
-        ),
+        None,
         (
             'baz',
             '3-3-docker-Use-pyenv-for-Python-versions',
@@ -379,9 +483,11 @@ def test_view__with_pager_multiple_ids(mock_popen, mock_env, capsys):
     patches.action_view(api, [1, 2, 3])
 
     mock_popen.assert_called_once_with(['less'], stdin=mock.ANY)
-    mock_popen.return_value.communicate.assert_has_calls(
+    mock_popen.return_value.stdin.write.assert_has_calls(
         [
-            mock.call(input=b'foo\nbar\nbaz'),
+            mock.call(b'foo'),
+            mock.call(b'\n'),
+            mock.call(b'baz'),
         ]
     )
 
@@ -389,33 +495,61 @@ def test_view__with_pager_multiple_ids(mock_popen, mock_env, capsys):
     assert captured.out == ''
 
 
-@mock.patch.object(patches.subprocess, 'Popen')
-def _test_action_apply(apply_cmd, mock_popen):
+@mock.patch.object(patches.os.environ, 'get')
+@mock.patch('subprocess.Popen')
+def test_view__with_pager_duplicate_ids(mock_popen, mock_env, capsys):
     api = mock.Mock()
-    api.patch_get.return_value = fakes.fake_patches()[0]
-    api.patch_get_mbox.return_value = (
-        'foo',
-        '1-3--Drop-support-for-Python-3-4--add-Python-3-7',
+    api.patch_get_mbox_many.return_value = [('foo', 'foo'), ('bar', 'bar')]
+    mock_env.return_value = 'less'
+
+    patches.action_view(api, [1, 2, 1])
+
+    api.patch_get_mbox_many.assert_called_once_with([1, 2])
+    mock_popen.return_value.stdin.write.assert_has_calls(
+        [
+            mock.call(b'foo'),
+            mock.call(b'\n'),
+            mock.call(b'bar'),
+            mock.call(b'\n'),
+            mock.call(b'foo'),
+        ]
     )
 
-    args = [api, 1157169]
-    if apply_cmd:
-        args.append(apply_cmd)
 
-    result = patches.action_apply(*args)
+@mock.patch.object(patches.os.environ, 'get')
+@mock.patch('subprocess.Popen')
+def test_view__with_pager_closed_early(mock_popen, mock_env, capsys):
+    api = mock.Mock()
+    api.patch_get_mbox_many.return_value = [('foo', 'foo'), ('bar', 'bar')]
+    mock_env.return_value = 'less'
+    mock_popen.return_value.stdin.write.side_effect = BrokenPipeError
+
+    patches.action_view(api, [1, 2])
+
+    mock_popen.return_value.stdin.write.assert_called_once_with(b'foo')
+    mock_popen.return_value.wait.assert_called_once_with()
+
+
+@mock.patch('subprocess.Popen')
+def _test_action_apply_many(apply_cmd, mock_popen):
+    api = mock.Mock()
+    api.patch_get.return_value = fakes.fake_patches()[0]
+    api.patch_get_mbox.side_effect = _fake_patch_get_mbox(
+        [('foo', '1-3--Drop-support-for-Python-3-4--add-Python-3-7')]
+    )
+
+    result = patches.action_apply_many(api, [1157169], apply_cmd)
 
     if not apply_cmd:
         apply_cmd = ['patch', '-p1']
 
-    mock_popen.assert_called_once_with(
-        apply_cmd, stdin=patches.subprocess.PIPE
-    )
+    mock_popen.assert_called_once_with(apply_cmd, stdin=subprocess.PIPE)
     mock_popen.return_value.communicate.assert_called_once_with(b'foo')
     assert result == mock_popen.return_value.returncode
 
 
-def test_action_apply(capsys):
-    _test_action_apply(None)
+def test_action_apply_many__default_apply_cmd(capsys):
+    _test_action_apply_many(None)
 
     captured = capsys.readouterr()
 
@@ -429,8 +563,8 @@ Description: [1/3] Drop support for Python 3.4, add Python 3.7
     assert captured.err == ''
 
 
-def test_action_apply__with_apply_cmd(capsys):
-    _test_action_apply(['git-am', '-3'])
+def test_action_apply_many__with_apply_cmd(capsys):
+    _test_action_apply_many(['git-am', '-3'])
 
     captured = capsys.readouterr()
 
@@ -444,88 +578,123 @@ Description: [1/3] Drop support for Python 3.4, add Python 3.7
     assert captured.err == ''
 
 
-@mock.patch.object(patches.subprocess, 'Popen')
-def test_action_apply__failed(mock_popen, capsys):
+@mock.patch('subprocess.Popen')
+def test_action_apply_many(mock_popen, capsys):
     api = mock.Mock()
-    api.patch_get.return_value = fakes.fake_patches()[0]
-    api.patch_get_mbox.side_effect = exceptions.APIError('foo')
+    api.patch_get.side_effect = [{'name': 'foo'}, {'name': 'bar'}]
+    api.patch_get_mbox.side_effect = _fake_patch_get_mbox(
+        [('foo', 'foo'), ('bar', 'bar')]
+    )
+    mock_popen.return_value.returncode = 0
 
-    with pytest.raises(SystemExit):
-        patches.action_apply(api, 1)
+    result = patches.action_apply_many(api, [1, 2], ['git', 'am'])
 
     captured = capsys.readouterr()
 
+    assert result == 0
+    mock_popen.return_value.communicate.assert_has_calls(
+        [mock.call(b'foo'), mock.call(b'bar')]
+    )
     assert (
         captured.out
         == """\
-Applying patch #1 to current directory
-Description: [1/3] Drop support for Python 3.4, add Python 3.7
+Applying patch #1 using "git am"
+Description: foo
+Applying patch #2 using "git am"
+Description: bar
 """
     )
-    assert captured.err == 'foo\n'
 
-    mock_popen.assert_not_called()
+
+@mock.patch('subprocess.Popen')
+def test_action_apply_many__failed(mock_popen, capsys):
+    api = mock.Mock()
+    api.patch_get.return_value = {'name': 'foo'}
+    api.patch_get_mbox.side_effect = _fake_patch_get_mbox(
+        [('foo', 'foo'), ('bar', 'bar'), ('baz', 'baz')]
+    )
+    mock_popen.return_value.returncode = 1
+
+    result = patches.action_apply_many(api, [1, 2, 3])
+
+    assert result == 1
+    mock_popen.return_value.communicate.assert_called_once_with(b'foo')
 
 
-def test_action_apply__invalid_id(capsys):
+@mock.patch('subprocess.Popen')
+def test_action_apply_many__invalid_id(mock_popen, capsys):
     api = mock.Mock()
-    api.patch_get.side_effect = exceptions.APIError('foo')
+    api.patch_get.return_value = {'name': 'foo'}
+    api.patch_get_mbox.side_effect = _fake_patch_get_mbox(
+        [('foo', 'foo'), exceptions.APIError('bar')]
+    )
+    mock_popen.return_value.returncode = 0
 
     with pytest.raises(SystemExit):
-        patches.action_apply(api, 1)
+        patches.action_apply_many(api, [1, 2])
 
     captured = capsys.readouterr()
 
-    assert captured.out == ''
-    assert captured.err == 'foo\n'
+    mock_popen.return_value.communicate.assert_called_once_with(b'foo')
+    assert captured.err == 'bar\n'
 
 
-def test_action_update__invalid_id(capsys):
+def test_action_update_many(capsys):
     api = mock.Mock()
-    api.patch_get.side_effect = exceptions.APIError('foo')
+    api.patch_set_many.return_value = [None, None]
 
-    with pytest.raises(SystemExit):
-        patches.action_update(api, 1)
+    patches.action_update_many(api, [1157169, 1157170], 'Accepted')
+
+    api.patch_set_many.assert_called_once_with(
+        [
+            {
+                'patch_id': 1157169,
+                'state': 'Accepted',
+                'archived': None,
+                'commit_ref': None,
+            },
+            {
+                'patch_id': 1157170,
+                'state': 'Accepted',
+                'archived': None,
+                'commit_ref': None,
+            },
+        ]
+    )
 
     captured = capsys.readouterr()
 
     assert captured.out == ''
-    assert captured.err == 'foo\n'
+    assert captured.err == ''
 
 
-def test_action_update(capsys):
+def test_action_update_many__all_options(capsys):
     api = mock.Mock()
-    api.patch_get.return_value = fakes.fake_patches()[0]
-    api.patch_set.return_value = True
+    api.patch_set_many.return_value = [None]
 
-    patches.action_update(api, 1157169, 'Accepted', 'yes', '698fa7f')
+    patches.action_update_many(api, [1157169], 'Accepted', 'yes', '698fa7f')
 
-    api.patch_set.assert_called_once_with(
-        1157169,
-        state='Accepted',
-        archived='yes',
-        commit_ref='698fa7f',
+    api.patch_get.assert_not_called()
+    api.patch_set_many.assert_called_once_with(
+        [
+            {
+                'patch_id': 1157169,
+                'state': 'Accepted',
+                'archived': 'yes',
+                'commit_ref': '698fa7f',
+            },
+        ]
     )
 
 
-def test_action_update__error(capsys):
+def test_action_update_many__error(capsys):
     api = mock.Mock()
-    api.patch_get.return_value = fakes.fake_patches()[0]
-    api.patch_set.side_effect = exceptions.APIError('foo')
+    api.patch_set_many.return_value = [None, exceptions.APIError('foo')]
 
     with pytest.raises(SystemExit):
-        patches.action_update(api, 1157169)
-
-    api.patch_set.assert_called_once_with(
-        1157169, archived=None, commit_ref=None, state=None
-    )
+        patches.action_update_many(api, [1157169, 1157170], 'Accepted')
 
     captured = capsys.readouterr()
 
     assert captured.out == ''
-    assert (
-        captured.err
-        == """\
-foo
-"""
-    )
+    assert captured.err == 'foo\n'
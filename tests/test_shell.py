@@ -161,7 +161,7 @@ def test_migrate_config(mock_migrate, mock_config):
 
 @mock.patch.object(utils.configparser, 'ConfigParser')
 @mock.patch.object(api, 'XMLRPC')
-@mock.patch.object(patches, 'action_apply')
+@mock.patch.object(patches, 'action_apply_many')
 def test_server_error(mock_action, mock_api, mock_config, capsys):
     mock_config.return_value = FakeConfig()
     mock_api.side_effect = exceptions.APIError('Unable to connect')
@@ -177,7 +177,7 @@ def test_server_error(mock_action, mock_api, mock_config, capsys):
 
 @mock.patch.object(utils.configparser, 'ConfigParser')
 @mock.patch.object(api, 'XMLRPC')
-@mock.patch.object(patches, 'action_apply')
+@mock.patch.object(patches, 'action_apply_many')
 def test_apply(mock_action, mock_api, mock_config):
     mock_config.return_value = FakeConfig()
     mock_action.return_value = None
@@ -186,47 +186,35 @@ def test_apply(mock_action, mock_api, mock_config):
 
     shell.main(['apply', '1'])
 
-    mock_action.assert_called_once_with(mock_api.return_value, 1)
+    mock_action.assert_called_once_with(mock_api.return_value, [1])
     mock_action.reset_mock()
 
     # then with multiple patch IDs
 
     shell.main(['apply', '1', '2', '3'])
 
-    mock_action.assert_has_calls(
-        [
-            mock.call(mock_api.return_value, 1),
-            mock.call(mock_api.return_value, 2),
-            mock.call(mock_api.return_value, 3),
-        ]
-    )
+    mock_action.assert_called_once_with(mock_api.return_value, [1, 2, 3])
 
 
 @mock.patch.object(utils.configparser, 'ConfigParser')
 @mock.patch.object(api, 'XMLRPC')
-@mock.patch.object(patches, 'action_apply')
+@mock.patch.object(patches, 'action_apply_many')
 def test_apply__failed(mock_action, mock_api, mock_config, capsys):
     mock_config.return_value = FakeConfig()
-    mock_action.side_effect = [0, 0, 1]
+    mock_action.return_value = 1
 
     with pytest.raises(SystemExit):
         shell.main(['apply', '1', '2', '3'])
 
     captured = capsys.readouterr()
 
-    mock_action.assert_has_calls(
-        [
-            mock.call(mock_api.return_value, 1),
-            mock.call(mock_api.return_value, 2),
-            mock.call(mock_api.return_value, 3),
-        ]
-    )
+    mock_action.assert_called_once_with(mock_api.return_value, [1, 2, 3])
     assert 'Apply failed with exit status 1' in captured.err
 
 
 @mock.patch.object(utils.configparser, 'ConfigParser')
 @mock.patch.object(api, 'XMLRPC')
-@mock.patch.object(checks, 'action_create')
+@mock.patch.object(checks, 'action_create_many')
 def test_check_create(mock_action, mock_api, mock_config):
     mock_config.return_value = FakeConfig(
         {
@@ -254,7 +242,7 @@ def test_check_create(mock_action, mock_api, mock_config):
 
     mock_action.assert_called_once_with(
         mock_api.return_value,
-        1,
+        [1],
         'testing',
         'pending',
         'https://example.com/',
@@ -264,7 +252,7 @@ def test_check_create(mock_action, mock_api, mock_config):
 
 @mock.patch.object(utils.configparser, 'ConfigParser')
 @mock.patch.object(api, 'XMLRPC')
-@mock.patch.object(checks, 'action_create')
+@mock.patch.object(checks, 'action_create_many')
 def test_check_create__no_auth(
     mock_action,
     mock_api,
@@ -360,18 +348,23 @@ def test_get__multiple_ids(mock_action, mock_api, mock_config):
 
 @mock.patch.object(utils.configparser, 'ConfigParser')
 @mock.patch.object(api, 'XMLRPC')
-@mock.patch.object(patches, 'patch_id_from_hash')
+@mock.patch.object(patches, 'patch_ids_from_hashes')
 @mock.patch.object(patches, 'action_get')
 def test_get__hash_ids(mock_action, mock_hash, mock_api, mock_config):
     mock_config.return_value = FakeConfig()
     mock_action.return_value = 0
-    mock_hash.return_value = 1
+    mock_hash.return_value = [1, 2]
 
-    shell.main(['get', '-h', '698fa7f'])
+    shell.main(['get', '-h', '698fa7f', '2a4c2b7'])
 
-    mock_action.assert_called_once_with(mock_api.return_value, 1)
+    mock_action.assert_has_calls(
+        [
+            mock.call(mock_api.return_value, 1),
+            mock.call(mock_api.return_value, 2),
+        ]
+    )
     mock_hash.assert_called_once_with(
-        mock_api.return_value, 'defaultproject', '698fa7f'
+        mock_api.return_value, 'defaultproject', ['698fa7f', '2a4c2b7']
     )
 
 
@@ -393,7 +386,7 @@ def test_get__no_ids(mock_action, mock_api, mock_config, capsys):
 
 @mock.patch.object(utils.configparser, 'ConfigParser')
 @mock.patch.object(api, 'XMLRPC')
-@mock.patch.object(patches, 'action_apply')
+@mock.patch.object(patches, 'action_apply_many')
 def test_git_am__no_args(mock_action, mock_api, mock_config):
     mock_config.return_value = FakeConfig()
     mock_action.return_value = 0
@@ -403,7 +396,7 @@ def test_git_am__no_args(mock_action, mock_api, mock_config):
     shell.main(['git-am', '1'])
 
     mock_action.assert_called_once_with(
-        mock_api.return_value, 1, ['git', 'am']
+        mock_api.return_value, [1], ['git', 'am']
     )
     mock_action.reset_mock()
 
@@ -411,18 +404,14 @@ def test_git_am__no_args(mock_action, mock_api, mock_config):
 
     shell.main(['git-am', '1', '2', '3'])
 
-    mock_action.assert_has_calls(
-        [
-            mock.call(mock_api.return_value, 1, ['git', 'am']),
-            mock.call(mock_api.return_value, 2, ['git', 'am']),
-            mock.call(mock_api.return_value, 3, ['git', 'am']),
-        ]
+    mock_action.assert_called_once_with(
+        mock_api.return_value, [1, 2, 3], ['git', 'am']
     )
 
 
 @mock.patch.object(utils.configparser, 'ConfigParser')
 @mock.patch.object(api, 'XMLRPC')
-@mock.patch.object(patches, 'action_apply')
+@mock.patch.object(patches, 'action_apply_many')
 def test_git_am__threeway_option(mock_action, mock_api, mock_config):
     mock_config.return_value = FakeConfig()
     mock_action.return_value = 0
@@ -430,13 +419,13 @@ def test_git_am__threeway_option(mock_action, mock_api, mock_config):
     shell.main(['git-am', '1', '-3'])
 
     mock_action.assert_called_once_with(
-        mock_api.return_value, 1, ['git', 'am', '-3']
+        mock_api.return_value, [1], ['git', 'am', '-3']
     )
 
 
 @mock.patch.object(utils.configparser, 'ConfigParser')
 @mock.patch.object(api, 'XMLRPC')
-@mock.patch.object(patches, 'action_apply')
+@mock.patch.object(patches, 'action_apply_many')
 def test_git_am__signoff_option(mock_action, mock_api, mock_config):
     mock_config.return_value = FakeConfig()
     mock_action.return_value = 0
@@ -444,14 +433,14 @@ def test_git_am__signoff_option(mock_action, mock_api, mock_config):
     shell.main(['git-am', '1', '-s'])
 
     mock_action.assert_called_once_with(
-        mock_api.return_value, 1, ['git', 'am', '-s']
+        mock_api.return_value, [1], ['git', 'am', '-s']
     )
     mock_action.reset_mock()
 
 
 @mock.patch.object(utils.configparser, 'ConfigParser')
 @mock.patch.object(api, 'XMLRPC')
-@mock.patch.object(patches, 'action_apply')
+@mock.patch.object(patches, 'action_apply_many')
 def test_git_am__threeway_global_conf(mock_action, mock_api, mock_config):
     mock_config.return_value = FakeConfig(
         {
@@ -465,13 +454,13 @@ def test_git_am__threeway_global_conf(mock_action, mock_api, mock_config):
     shell.main(['git-am', '1'])
 
     mock_action.assert_called_once_with(
-        mock_api.return_value, 1, ['git', 'am', '-3']
+        mock_api.return_value, [1], ['git', 'am', '-3']
     )
 
 
 @mock.patch.object(utils.configparser, 'ConfigParser')
 @mock.patch.object(api, 'XMLRPC')
-@mock.patch.object(patches, 'action_apply')
+@mock.patch.object(patches, 'action_apply_many')
 def test_git_am__signoff_global_conf(mock_action, mock_api, mock_config):
     mock_config.return_value = FakeConfig(
         {
@@ -485,14 +474,14 @@ def test_git_am__signoff_global_conf(mock_action, mock_api, mock_config):
     shell.main(['git-am', '1'])
 
     mock_action.assert_called_once_with(
-        mock_api.return_value, 1, ['git', 'am', '-s']
+        mock_api.return_value, [1], ['git', 'am', '-s']
     )
     mock_action.reset_mock()
 
 
 @mock.patch.object(utils.configparser, 'ConfigParser')
 @mock.patch.object(api, 'XMLRPC')
-@mock.patch.object(patches, 'action_apply')
+@mock.patch.object(patches, 'action_apply_many')
 def test_git_am__threeway_project_conf(mock_action, mock_api, mock_config):
     mock_config.return_value = FakeConfig(
         {
@@ -506,13 +495,13 @@ def test_git_am__threeway_project_conf(mock_action, mock_api, mock_config):
     shell.main(['git-am', '1'])
 
     mock_action.assert_called_once_with(
-        mock_api.return_value, 1, ['git', 'am', '-3']
+        mock_api.return_value, [1], ['git', 'am', '-3']
     )
 
 
 @mock.patch.object(utils.configparser, 'ConfigParser')
 @mock.patch.object(api, 'XMLRPC')
-@mock.patch.object(patches, 'action_apply')
+@mock.patch.object(patches, 'action_apply_many')
 def test_git_am__signoff_project_conf(mock_action, mock_api, mock_config):
     mock_config.return_value = FakeConfig(
         {
@@ -526,14 +515,14 @@ def test_git_am__signoff_project_conf(mock_action, mock_api, mock_config):
     shell.main(['git-am', '1'])
 
     mock_action.assert_called_once_with(
-        mock_api.return_value, 1, ['git', 'am', '-s']
+        mock_api.return_value, [1], ['git', 'am', '-s']
     )
     mock_action.reset_mock()
 
 
 @mock.patch.object(utils.configparser, 'ConfigParser')
 @mock.patch.object(api, 'XMLRPC')
-@mock.patch.object(patches, 'action_apply')
+@mock.patch.object(patches, 'action_apply_many')
 def test_git_am__failure(mock_action, mock_api, mock_config, capsys):
     mock_config.return_value = FakeConfig()
     mock_action.return_value = 1
@@ -542,7 +531,7 @@ def test_git_am__failure(mock_action, mock_api, mock_config, capsys):
         shell.main(['git-am', '1'])
 
     mock_action.assert_called_once_with(
-        mock_api.return_value, 1, ['git', 'am']
+        mock_api.return_value, [1], ['git', 'am']
     )
     mock_action.reset_mock()
 
@@ -554,7 +543,7 @@ def test_git_am__failure(mock_action, mock_api, mock_config, capsys):
 
 @mock.patch.object(utils.configparser, 'ConfigParser')
 @mock.patch.object(api, 'XMLRPC')
-@mock.patch.object(patches, 'action_info')
+@mock.patch.object(patches, 'action_info_many')
 def test_info(mock_action, mock_api, mock_config):
     mock_config.return_value = FakeConfig()
     mock_action.return_value = None
@@ -563,20 +552,14 @@ def test_info(mock_action, mock_api, mock_config):
 
     shell.main(['info', '1'])
 
-    mock_action.assert_called_once_with(mock_api.return_value, 1)
+    mock_action.assert_called_once_with(mock_api.return_value, [1])
     mock_action.reset_mock()
 
     # then with multiple patch IDs
 
     shell.main(['info', '1', '2', '3'])
 
-    mock_action.assert_has_calls(
-        [
-            mock.call(mock_api.return_value, 1),
-            mock.call(mock_api.return_value, 2),
-            mock.call(mock_api.return_value, 3),
-        ]
-    )
+    mock_action.assert_called_once_with(mock_api.return_value, [1, 2, 3])
 
 
 @mock.patch.object(utils.configparser, 'ConfigParser')
@@ -862,7 +845,7 @@ def test_states(mock_action, mock_api, mock_config):
 
 @mock.patch.object(utils.configparser, 'ConfigParser')
 @mock.patch.object(api, 'XMLRPC')
-@mock.patch.object(patches, 'action_update')
+@mock.patch.object(patches, 'action_update_many')
 def test_update__no_options(
     mock_action,
     mock_api,
@@ -889,7 +872,7 @@ def test_update__no_options(
 
 @mock.patch.object(utils.configparser, 'ConfigParser')
 @mock.patch.object(api, 'XMLRPC')
-@mock.patch.object(patches, 'action_update')
+@mock.patch.object(patches, 'action_update_many')
 def test_update__no_auth(
     mock_action,
     mock_api,
@@ -909,7 +892,7 @@ def test_update__no_auth(
 
 @mock.patch.object(utils.configparser, 'ConfigParser')
 @mock.patch.object(api, 'XMLRPC')
-@mock.patch.object(patches, 'action_update')
+@mock.patch.object(patches, 'action_update_many')
 def test_update__state_option(mock_action, mock_api, mock_config):
     mock_config.return_value = FakeConfig(
         {
@@ -924,7 +907,7 @@ def test_update__state_option(mock_action, mock_api, mock_config):
 
     mock_action.assert_called_once_with(
         mock_api.return_value,
-        1,
+        [1],
         state='Accepted',
         archived=None,
         commit_ref=None,
@@ -933,7 +916,7 @@ def test_update__state_option(mock_action, mock_api, mock_config):
 
 @mock.patch.object(utils.configparser, 'ConfigParser')
 @mock.patch.object(api, 'XMLRPC')
-@mock.patch.object(patches, 'action_update')
+@mock.patch.object(patches, 'action_update_many')
 def test_update__archive_option(mock_action, mock_api, mock_config):
     mock_config.return_value = FakeConfig(
         {
@@ -947,13 +930,17 @@ def test_update__archive_option(mock_action, mock_api, mock_config):
     shell.main(['update', '1', '-a', 'yes'])
 
     mock_action.assert_called_once_with(
-        mock_api.return_value, 1, state=None, archived='yes', commit_ref=None
+        mock_api.return_value,
+        [1],
+        state=None,
+        archived='yes',
+        commit_ref=None,
     )
 
 
 @mock.patch.object(utils.configparser, 'ConfigParser')
 @mock.patch.object(api, 'XMLRPC')
-@mock.patch.object(patches, 'action_update')
+@mock.patch.object(patches, 'action_update_many')
 def test_update__commitref_option(mock_action, mock_api, mock_config):
     mock_config.return_value = FakeConfig(
         {
@@ -968,7 +955,7 @@ def test_update__commitref_option(mock_action, mock_api, mock_config):
 
     mock_action.assert_called_once_with(
         mock_api.return_value,
-        1,
+        [1],
         state='Accepted',
         archived=None,
         commit_ref='698fa7f',
@@ -977,7 +964,7 @@ def test_update__commitref_option(mock_action, mock_api, mock_config):
 
 @mock.patch.object(utils.configparser, 'ConfigParser')
 @mock.patch.object(api, 'XMLRPC')
-@mock.patch.object(patches, 'action_update')
+@mock.patch.object(patches, 'action_update_many')
 def test_update__commitref_with_multiple_patches(
     mock_action,
     mock_api,
@@ -0,0 +1,43 @@
+from unittest import mock
+
+from pwclient import xmlrpc
+
+
+@mock.patch('http.client.HTTPSConnection')
+def test_transport_make_connection__reuse(mock_conn):
+    transport = xmlrpc.Transport('https://example.com/xmlrpc')
+
+    conn_a = transport.make_connection('example.com')
+    conn_b = transport.make_connection('example.com')
+
+    assert conn_a is conn_b
+    mock_conn.assert_called_once()
+
+
+@mock.patch('http.client.HTTPSConnection')
+def test_transport_make_connection__after_close(mock_conn):
+    transport = xmlrpc.Transport('https://example.com/xmlrpc')
+
+    transport.make_connection('example.com')
+    transport.close()
+    transport.make_connection('example.com')
+
+    assert mock_conn.call_count == 2
+
+
+def test_server_proxy__cached_methods():
+    proxy = xmlrpc.ServerProxy('https://example.com/xmlrpc')
+
+    assert proxy.patch_get is proxy.patch_get
+    assert proxy.patch_get is not proxy.patch_list
+
+
+@mock.patch('http.client.HTTPSConnection')
+def test_transport_send_request__gzip(mock_conn):
+    # the stdlib asks for compressed responses by default; make sure our
+    # transport doesn't lose that
+    transport = xmlrpc.Transport('https://example.com/xmlrpc')
+
+    transport.send_request('example.com', '/xmlrpc/', b'<xml/>', False)
+
+    mock_conn.return_value.putheader.assert_any_call('Accept-Encoding', 'gzip')